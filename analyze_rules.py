@@ -0,0 +1,335 @@
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from pathlib import Path
+
+from fix_dark_mode import (RULES_FILE, ROOT, Matcher, RuleSet, apply_rulesets, atomic_write,
+                           plan_files, rewrite_files, rules_digest, tomllib)
+
+# Static analysis of dark_mode_rules.toml.  Every rule set is loaded as a
+# plain trie of its needles, which finds *all* needle occurrences inside a
+# piece of text (the engine's regex only reports the leftmost-longest one).
+# That answers, per rule set and across rule sets:
+#   shadowed   needle a occurs inside needle b, so a never fires where b does
+#   implied    the rest of the set already turns b's needle into b's output
+#   duplicate  the same needle twice (the engine keeps the first)
+#   retrigger  a rule's output contains another needle, so it fires again:
+#              in the same run when that needle belongs to a later rule set,
+#              on the next run otherwise
+#   unused     a rule that never fires on the files its set targets
+# The minimized rule file drops duplicates, implied rules and rules whose
+# needle a broader earlier rule set already rewrites into the same output.
+# Before it is written it is checked against the current tree: it must give
+# every file the same output as the original rules, except for repeats the
+# original re-triggering added, and the same output with the rule sets run
+# in reverse order.  Otherwise nothing is written unless --force is given.
+
+
+# ── TRIE ─────────────────────────────────────────────────────────────
+
+def build_trie(needles):
+    """Character trie; the ``None`` key of a node holds the needle ending there."""
+    root = {}
+    for needle in needles:
+        node = root
+        for ch in needle:
+            node = node.setdefault(ch, {})
+        node[None] = needle
+    return root
+
+
+def occurrences(trie, text):
+    """Yield ``(start, needle)`` for every needle occurrence in ``text``, overlaps included."""
+    for start in range(len(text)):
+        node = trie
+        for ch in text[start:]:
+            node = node.get(ch)
+            if node is None:
+                break
+            if None in node:
+                yield start, node[None]
+
+
+# ── RULE SETS ────────────────────────────────────────────────────────
+
+def load_entries(path=RULES_FILE):
+    """Raw ``[[ruleset]]`` tables, rules as (old, new) tuples in file order."""
+    with open(path, 'rb') as f:
+        data = tomllib.load(f)
+    entries = []
+    for entry in data.get('ruleset', []):
+        entry = dict(entry)
+        entry['rules'] = [tuple(rule) for rule in entry.get('rules', [])]
+        entries.append(entry)
+    return entries
+
+
+def compile_entry(entry):
+    rules = entry['rules']
+    return RuleSet(entry['name'], entry.get('include', ['**/*.tsx']), entry.get('exclude', []),
+                   Matcher(rules), rules_digest(rules))
+
+
+def compile_entries(entries):
+    return {entry['name']: compile_entry(entry) for entry in entries}
+
+
+def _crosses_end(needle, others):
+    """True when some other needle starts inside ``needle`` and runs past its end."""
+    for i in range(1, len(needle)):
+        suffix = needle[i:]
+        if any(len(other) > len(suffix) and other.startswith(suffix) for other in others):
+            return True
+    return False
+
+
+def is_implied(rule, rules):
+    """True when dropping ``rule`` from ``rules`` cannot change any output.
+
+    The remaining rules must rewrite the needle into exactly the same
+    output, and none of their needles may start inside it and end past it
+    (with the rule present, such a match would have been consumed).
+    """
+    old, new = rule
+    rest = [r for r in rules if r[0] != old]
+    if not rest:
+        return False
+    # The rest can only rewrite the needle if one of theirs occurs in it
+    rewritten = Matcher(rest).sub(old) if any(o in old for o, _ in rest) else old
+    if rewritten != new:
+        return False
+    return not _crosses_end(old, [r[0] for r in rest])
+
+
+# ── ANALYSIS ─────────────────────────────────────────────────────────
+
+def analyze(entries, plan, jobs):
+    """Findings for ``entries`` against the files of ``plan`` ({path: [RuleSet]})."""
+    names = [entry['name'] for entry in entries]
+    files = {name: {p for p, rulesets in plan.items() if any(rs.name == name for rs in rulesets)}
+             for name in names}
+    tries = {entry['name']: build_trie({old for old, _ in entry['rules']}) for entry in entries}
+
+    duplicates, shadowed, implied, retriggers = [], [], [], []
+    for i, entry in enumerate(entries):
+        name = entry['name']
+        seen = {}
+        for old, new in entry['rules']:
+            if old in seen:
+                duplicates.append({'ruleset': name, 'rule': old,
+                                   'conflicting': seen[old] != new})
+            else:
+                seen[old] = new
+        rules = list(seen.items())
+
+        for old, _ in rules:
+            for start, inner in occurrences(tries[name], old):
+                if inner != old:
+                    shadowed.append({'ruleset': name, 'rule': inner, 'by': old,
+                                     'kind': 'prefix' if start == 0 else 'inner'})
+        implied.extend({'ruleset': name, 'rule': old}
+                       for old, new in rules if is_implied((old, new), rules))
+
+        for j, other in enumerate(names):
+            if not files[name] & files[other]:
+                continue
+            when = 'same-run' if j > i else 'next-run'
+            for old, new in rules:
+                for hit in sorted({needle for _, needle in occurrences(tries[other], new)}):
+                    retriggers.append({'ruleset': name, 'rule': old, 'fires': hit,
+                                       'in': other, 'when': when})
+
+    hits = Counter()
+    for result in rewrite_files(plan, jobs, dry_run=True):
+        hits.update(result.hits or {})
+    unused = [{'ruleset': entry['name'], 'rule': old}
+              for entry in entries for old in dict(entry['rules'])
+              if not hits[(entry['name'], old)]]
+
+    return {'duplicates': duplicates, 'shadowed': shadowed, 'implied': implied,
+            'retriggers': retriggers, 'unused': unused}
+
+
+# ── MINIMIZATION ─────────────────────────────────────────────────────
+
+def minimize(entries, plan, drop_unused=(), cross_set=True, log=None):
+    """Copies of ``entries`` with redundant rules removed.
+
+    Per rule set: later duplicates of a needle, then implied rules, longest
+    first and re-checked after every removal. Across rule sets: a rule whose
+    needle an earlier rule set targeting every one of the same files already
+    rewrites into the rule's output, since its only effect is to fire again
+    on that set's output, or to fire first when the sets run in the other
+    order (skipped with ``cross_set=False``, which keeps the output identical).
+    ``drop_unused`` is a set of ``(rule set, needle)`` pairs to drop as well.
+    """
+    log = log or (lambda message: None)
+    names = [entry['name'] for entry in entries]
+    files = {name: {p for p, rulesets in plan.items() if any(rs.name == name for rs in rulesets)}
+             for name in names}
+    result = []
+    for i, entry in enumerate(entries):
+        name = entry['name']
+        first = {}
+        for old, new in entry['rules']:
+            first.setdefault(old, new)
+        rules = [(old, new) for old, new in first.items() if (name, old) not in drop_unused]
+
+        for rule in sorted(rules, key=lambda r: -len(r[0])):
+            if is_implied(rule, rules):
+                rules.remove(rule)
+                log(f"  {name}: implied: {rule[0]}")
+
+        for earlier in result if cross_set else ():
+            if files[name] <= files[earlier['name']] and earlier['rules']:
+                matcher = Matcher(earlier['rules'])
+                for rule in [r for r in rules if matcher.sub(r[0]) == r[1]]:
+                    rules.remove(rule)
+                    log(f"  {name}: already done by {earlier['name']}: {rule[0]}")
+
+        result.append(dict(entry, rules=rules))
+    return result
+
+
+def compare(plan, before, after, reverse=False, scope='classes'):
+    """Paths in ``plan`` whose rewritten content differs between two rule pipelines.
+
+    ``before`` and ``after`` are ``{name: RuleSet}``; each file runs through
+    the sets it is planned for, in plan order -- or, for ``after`` with
+    ``reverse``, in the opposite order, which exposes order dependence.
+    """
+    differ = []
+    for path, rulesets in plan.items():
+        text = Path(path).read_text(encoding='utf-8')
+        names = [rs.name for rs in rulesets]
+        old = apply_rulesets(text, [before[n] for n in names if n in before], scope)
+        new = apply_rulesets(text, [after[n] for n in (names[::-1] if reverse else names)
+                                    if n in after], scope)
+        if old != new:
+            differ.append(path)
+    return differ
+
+
+def _toml_string(value):
+    if "'" not in value and '\n' not in value:
+        return f"'{value}'"
+    return json.dumps(value, ensure_ascii=False)
+
+
+def dump_entries(entries, source):
+    """Render ``entries`` as a rule file in the layout of dark_mode_rules.toml."""
+    lines = [f"# Minimized from {source} by analyze_rules.py; regenerate rather than edit.", '']
+    for entry in entries:
+        lines.append('[[ruleset]]')
+        for key, value in entry.items():
+            if key == 'rules':
+                continue
+            if isinstance(value, list):
+                value = '[' + ', '.join(_toml_string(v) for v in value) + ']'
+            else:
+                value = _toml_string(value)
+            lines.append(f"{key} = {value}")
+        lines.append('rules = [')
+        for old, new in entry['rules']:
+            lines.append(f"    [{_toml_string(old)},")
+            lines.append(f"     {_toml_string(new)}],")
+        lines.extend([']', ''])
+    return '\n'.join(lines)
+
+
+# ── CLI ──────────────────────────────────────────────────────────────
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Find shadowed, implied, re-triggering and unused dark-mode rules, '
+                    'and optionally write a minimized rule file.')
+    parser.add_argument('--rules', type=Path, default=RULES_FILE,
+                        help='rule file to analyze (default: %(default)s)')
+    parser.add_argument('--output', type=Path, metavar='PATH',
+                        help='write the minimized rule file here')
+    parser.add_argument('--drop-unused', action='store_true',
+                        help='also drop rules that never fire on the current tree')
+    parser.add_argument('--force', action='store_true',
+                        help='write the minimized rule file even if it changes what the '
+                             'rules do on the current tree')
+    parser.add_argument('--json', type=Path, metavar='PATH',
+                        help='write every finding as JSON')
+    parser.add_argument('--limit', type=int, default=10,
+                        help='findings to list per category (default: %(default)s)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='worker processes for the tree scan (default: CPU count)')
+    return parser.parse_args(argv)
+
+
+def _show(title, rows, limit, fmt):
+    print(f"\n{title}: {len(rows)}")
+    for row in rows[:limit]:
+        print('  ' + fmt(row))
+    if len(rows) > limit:
+        print(f"  ... {len(rows) - limit} more")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    entries = load_entries(args.rules)
+    compiled = compile_entries(entries)
+    plan = plan_files(ROOT, list(compiled.values()))
+    print(f"Analyzing {sum(len(e['rules']) for e in entries)} rules in {len(entries)} "
+          f"rule sets against {len(plan)} files")
+
+    findings = analyze(entries, plan, args.jobs)
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(findings, f, ensure_ascii=False, indent=2)
+
+    limit = args.limit
+    _show('Duplicate needles', findings['duplicates'], limit,
+          lambda r: f"{r['ruleset']}: {r['rule']}" + (' (different output)' if r['conflicting'] else ''))
+    _show('Shadowed needles', findings['shadowed'], limit,
+          lambda r: f"{r['ruleset']}: {r['rule']!r} "
+                    f"{'starts' if r['kind'] == 'prefix' else 'occurs inside'} {r['by']!r}")
+    _show('Implied rules', findings['implied'], limit,
+          lambda r: f"{r['ruleset']}: {r['rule']}")
+    same_run = [r for r in findings['retriggers'] if r['when'] == 'same-run']
+    next_run = [r for r in findings['retriggers'] if r['when'] == 'next-run']
+    _show('Outputs re-triggered later in the same run', same_run, limit,
+          lambda r: f"{r['ruleset']}: {r['rule']!r} -> {r['in']}: {r['fires']!r}")
+    _show('Outputs re-triggered on the next run', next_run, limit,
+          lambda r: f"{r['ruleset']}: {r['rule']!r} -> {r['in']}: {r['fires']!r}")
+    _show('Rules that never fire on the current tree', findings['unused'], limit,
+          lambda r: f"{r['ruleset']}: {r['rule']}")
+
+    if not args.output:
+        return
+    drop = {(r['ruleset'], r['rule']) for r in findings['unused']} if args.drop_unused else set()
+    print('\nMinimizing:')
+    minimized = minimize(entries, plan, drop, log=print)
+    reduced = compile_entries(minimized)
+
+    def names(paths):
+        return ': ' + ', '.join(Path(p).name for p in paths) if paths else ''
+
+    print('\nChecking against the current tree:')
+    within = compare(plan, compiled, compile_entries(minimize(entries, plan, drop, cross_set=False)))
+    print(f"  Dropping duplicate, implied and unused rules changes {len(within)} files"
+          + names(within))
+    across = compare(plan, compiled, reduced)
+    print(f"  Dropping rules an earlier rule set already applies changes {len(across)} files "
+          f"(the earlier set's output no longer re-triggers them)")
+    reordered = compare(plan, reduced, reduced, reverse=True)
+    print(f"  Result depends on rule-set order in {len(reordered)} files" + names(reordered))
+    if (within or reordered) and not args.force:
+        sys.exit(f"Not writing {args.output}: it changes what the rules do on the current "
+                 f"tree; use --force to write it anyway.")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(args.output, dump_entries(minimized, args.rules.name).encode('utf-8'))
+    print(f"\nWrote {args.output}: {sum(len(e['rules']) for e in minimized)} of "
+          f"{sum(len(e['rules']) for e in entries)} rules kept.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,391 @@
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fix_dark_mode import CACHE_DIR, RULES_FILE, content_digest, load_rulesets, rewrite_files
+from update_admin_modal import Patch, PatchError, apply_patches
+
+BASELINE_FILE = CACHE_DIR.parent / 'bench' / 'baseline.json'
+
+# Offline benchmark for the rewrite engines.  A seeded generator writes TSX
+# pages and modals shaped like the ones under src/ -- long className strings
+# (some of them rule needles, some already dark), nested JSX, cn()/template
+# classes and Arabic copy, 5 KB to 200 KB per file -- so runs are comparable
+# across machines and commits without touching the real tree.
+
+
+# ── CORPUS GENERATOR ─────────────────────────────────────────────────
+
+UTILITIES = [
+    'flex', 'inline-flex', 'grid', 'block', 'hidden', 'relative', 'absolute', 'items-center',
+    'items-start', 'justify-between', 'justify-center', 'gap-1', 'gap-2', 'gap-3', 'gap-4',
+    'gap-6', 'p-2', 'p-3', 'p-4', 'p-6', 'px-3', 'px-4', 'px-6', 'py-2', 'py-3', 'py-4',
+    'mt-1', 'mt-2', 'mb-2', 'mb-4', 'w-full', 'h-10', 'h-11', 'min-w-0', 'max-w-2xl',
+    'rounded-lg', 'rounded-xl', 'rounded-2xl', 'rounded-[20px]', 'rounded-full', 'shadow-sm',
+    'shadow-card', 'shadow-xl', 'border', 'border-b', 'border-t', 'text-xs', 'text-sm',
+    'text-lg', 'text-xl', 'text-2xl', 'font-medium', 'font-bold', 'font-extrabold',
+    'truncate', 'overflow-hidden', 'transition-colors', 'transition-all', 'duration-200',
+    'cursor-pointer', 'grid-cols-2', 'md:grid-cols-3', 'lg:col-span-2', 'space-y-4',
+]
+COLORS = [
+    'bg-white', 'bg-slate-50', 'bg-slate-100', 'text-charcoal', 'text-slate-500',
+    'text-slate-600', 'text-slate-400', 'border-slate-100', 'border-slate-200',
+    'hover:bg-slate-50', 'hover:bg-slate-100', 'bg-shibl-crimson', 'text-white',
+    'hover:text-shibl-crimson', 'bg-emerald-50', 'text-emerald-600', 'bg-amber-50',
+]
+DARK = ['dark:bg-[#1E1E1E]', 'dark:bg-[#2A2A2A]', 'dark:text-slate-300',
+        'dark:text-white', 'dark:border-white/10', 'dark:hover:bg-white/5']
+ARABIC = [
+    'إدارة المحاضرات', 'تفاصيل ولي الأمر', 'لا توجد بيانات', 'حفظ التغييرات', 'إلغاء',
+    'عرض شامل لمعلومات الطالب', 'المدفوعات المعلقة', 'إضافة مادة جديدة', 'جاري التحميل...',
+    'تم الحفظ بنجاح', 'البحث عن معلم', 'الجدول الأسبوعي', 'تقارير العملاء',
+]
+TAGS = ['div', 'div', 'div', 'section', 'span', 'p', 'button', 'label', 'h3', 'li']
+ICONS = ['X', 'Check', 'Search', 'Plus', 'Trash2', 'Edit', 'Calendar', 'Users', 'Loader2']
+
+MIN_SIZE = 5 * 1024
+MAX_SIZE = 200 * 1024
+
+
+def rule_needles(path=RULES_FILE):
+    """Every rule needle in the rule file, so generated classes hit real rules."""
+    rulesets = load_rulesets(path)
+    return sorted({key.strip('"\' :') for rs in rulesets.values() for key in rs.rewriter.rule_keys})
+
+
+class PageGenerator:
+    """Deterministic TSX source generator; same seed, same files."""
+
+    def __init__(self, seed, needles):
+        self.rng = random.Random(seed)
+        self.needles = needles
+
+    def class_string(self):
+        rng = self.rng
+        roll = rng.random()
+        if roll < 0.35 and self.needles:
+            # A rule needle with some unrelated utilities around it
+            tokens = [rng.choice(self.needles)]
+            tokens[:0] = rng.sample(UTILITIES, rng.randint(0, 3))
+            tokens += rng.sample(UTILITIES, rng.randint(0, 4))
+        else:
+            tokens = rng.sample(UTILITIES, rng.randint(3, 12))
+            tokens += rng.sample(COLORS, rng.randint(1, 3))
+            if roll > 0.8:
+                tokens += rng.sample(DARK, rng.randint(1, 3))
+        return ' '.join(tokens)
+
+    def class_attr(self):
+        rng = self.rng
+        roll = rng.random()
+        if roll < 0.7:
+            return f'className="{self.class_string()}"'
+        if roll < 0.85:
+            return (f"className={{`{self.class_string()} ${{isActive ? "
+                    f"'{self.class_string()}' : '{self.class_string()}'}}`}}")
+        return (f"className={{cn('{self.class_string()}', "
+                f"selected && '{self.class_string()}')}}")
+
+    def element(self, depth, indent):
+        rng = self.rng
+        pad = ' ' * indent
+        tag = rng.choice(TAGS)
+        open_tag = f'{pad}<{tag} {self.class_attr()}>'
+        if depth <= 0 or rng.random() < 0.25:
+            text = rng.choice(ARABIC)
+            if rng.random() < 0.3:
+                text = f'<{rng.choice(ICONS)} size={{16}} /> ' + text
+            return [f'{open_tag}{text}</{tag}>']
+        lines = [open_tag]
+        for _ in range(rng.randint(1, 4)):
+            lines.extend(self.element(depth - 1, indent + 4))
+        lines.append(f'{pad}</{tag}>')
+        return lines
+
+    def target_size(self):
+        # Log-uniform, like the real tree: many small files, a few huge ones
+        return int(math.exp(self.rng.uniform(math.log(MIN_SIZE), math.log(MAX_SIZE))))
+
+    def body(self, size, indent):
+        lines = []
+        total = 0
+        while total < size:
+            block = self.element(self.rng.randint(2, 5), indent)
+            lines.extend(block)
+            total += sum(len(line.encode('utf-8')) + 1 for line in block)
+        return lines
+
+    def page(self, name):
+        size = self.target_size()
+        head = [
+            "import { useState } from 'react';",
+            f"import {{ {', '.join(sorted(self.rng.sample(ICONS, 4)))} }} from 'lucide-react';",
+            "import { cn } from '../../lib/utils';",
+            '',
+            f'const {name} = () => {{',
+            '    const [isActive, setIsActive] = useState(false);',
+            '    const [selected, setSelected] = useState(null);',
+            '',
+            '    return (',
+            f'        <div {self.class_attr()}>',
+        ]
+        tail = ['        </div>', '    );', '};', '', f'export default {name};', '']
+        return '\n'.join(head + self.body(size, 12) + tail)
+
+    def modal(self, name):
+        size = self.target_size()
+        head = [
+            "import { useState } from 'react';",
+            "import { X, Loader2 } from 'lucide-react';",
+            '',
+            f'const {name} = ({{ isOpen, onClose }}) => {{',
+            '    const [isActive, setIsActive] = useState(false);',
+            '    const [selected, setSelected] = useState(null);',
+            '',
+            '    if (!isOpen) return null;',
+            '',
+            '    return (',
+            '        <div className="fixed inset-0 z-50 flex items-center justify-center p-4 '
+            'bg-black/50 backdrop-blur-sm">',
+            f'            <div {self.class_attr()}>',
+        ]
+        tail = ['            </div>', '        </div>', '    );', '};', '',
+                f'export default {name};', '']
+        return '\n'.join(head + self.body(size, 16) + tail)
+
+
+def generate_corpus(root, count, seed=0, needles=None):
+    """Write ``count`` generated files under ``root``; returns their paths in order."""
+    gen = PageGenerator(seed, rule_needles() if needles is None else needles)
+    root = Path(root)
+    paths = []
+    for i in range(count):
+        if gen.rng.random() < 0.3:
+            name = f'Bench{i:04d}Modal'
+            path = root / 'components' / f'{name}.tsx'
+            source = gen.modal(name)
+        else:
+            name = f'Bench{i:04d}Page'
+            path = root / 'pages' / f'group{i % 8}' / f'{name}.tsx'
+            source = gen.page(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(source, encoding='utf-8')
+        paths.append(path)
+    return paths
+
+
+def synthetic_patches(content, seed=0, count=12):
+    """Patches in the style of update_admin_modal.py against generated ``content``:
+    single-line className anchors and multi-line block anchors, each unique."""
+    rng = random.Random(seed)
+    lines = content.split('\n')
+    patches = []
+    used = set()
+    for n in range(count):
+        for _ in range(50):
+            start = rng.randrange(len(lines) - 4)
+            span = range(start, start + (3 if n % 2 else 1))
+            if used & set(span):
+                continue
+            if n % 2:
+                # Lines are matched stripped, so anchor on a distinctive one
+                if 'className="' not in lines[start]:
+                    continue
+                old = '\n'.join(lines[i] for i in span)
+                new = old + ' {/* patched */}'
+            else:
+                line = lines[start]
+                at = line.find('className="')
+                if at < 0:
+                    continue
+                old = line[at:line.index('"', at + 11) + 1]
+                new = old[:-1] + ' dark:text-slate-300"'
+            if content.count(old) == 1:
+                used.update(range(span.start - 1, span.stop + 1))
+                patches.append(Patch(f'patch {n}', old, new))
+                break
+    return patches
+
+
+# ── MEASUREMENT ──────────────────────────────────────────────────────
+
+def _best_of(repeat, prepare, run):
+    best = None
+    for _ in range(repeat):
+        state = prepare()
+        start = time.perf_counter()
+        run(state)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_rewrite(corpus, files, mode, jobs, scope, repeat, workdir):
+    """Best-of-``repeat`` seconds for one fix_dark_mode pass over ``files``."""
+    rulesets = list(load_rulesets(RULES_FILE, mode).values())
+    work = Path(workdir) / 'run'
+
+    def prepare():
+        # Every run starts from the pristine corpus; copying is not timed
+        shutil.rmtree(work, ignore_errors=True)
+        shutil.copytree(corpus, work)
+        return {work / Path(path).relative_to(corpus): rulesets for path in files}
+
+    def run(plan):
+        for _ in rewrite_files(plan, jobs, scope=scope):
+            pass
+
+    return _best_of(repeat, prepare, run)
+
+
+def bench_patches(files, repeat, seed):
+    """Best-of-``repeat`` seconds for apply_patches over every generated modal."""
+    cases = []
+    for i, path in enumerate(files):
+        content = Path(path).read_text(encoding='utf-8')
+        patches = synthetic_patches(content, seed + i)
+        try:
+            apply_patches(content, patches)
+        except PatchError:
+            continue
+        cases.append((content, patches))
+
+    def run(_):
+        for content, patches in cases:
+            apply_patches(content, patches)
+
+    return _best_of(repeat, lambda: None, run), sum(len(c.encode('utf-8')) for c, _ in cases), len(cases)
+
+
+def run_suite(args):
+    """Run every case: ``(corpus digest, {case name: {seconds, bytes, files, mb_s, files_s}})``."""
+    results = {}
+
+    def record(name, seconds, size, count):
+        results[name] = {'seconds': seconds, 'bytes': size, 'files': count,
+                         'mb_s': size / seconds / 1e6, 'files_s': count / seconds}
+        print(f"  {name:42} {size / 1e6:7.2f} MB {count:5} files "
+              f"{size / seconds / 1e6:8.2f} MB/s {count / seconds:9.1f} files/s", file=sys.stderr)
+
+    with tempfile.TemporaryDirectory(prefix='bench_rewrite.') as tmp:
+        corpus = Path(tmp) / 'corpus'
+        files = generate_corpus(corpus, max(args.sizes), args.seed)
+        digest = content_digest(b''.join(p.read_bytes() for p in files))
+        for count in args.sizes:
+            subset = files[:count]
+            size = sum(p.stat().st_size for p in subset)
+            for mode in args.modes:
+                for jobs in args.jobs:
+                    seconds = bench_rewrite(corpus, subset, mode, jobs, args.scope,
+                                            args.repeat, tmp)
+                    record(f'rewrite/{mode}/{args.scope}/files={count}/jobs={jobs}',
+                           seconds, size, count)
+            modals = [p for p in subset if p.name.endswith('Modal.tsx')]
+            seconds, size, cases = bench_patches(modals, args.repeat, args.seed)
+            if cases:
+                record(f'patches/files={count}', seconds, size, cases)
+    return digest, results
+
+
+# ── BASELINES ────────────────────────────────────────────────────────
+
+def environment():
+    return {'python': platform.python_version(), 'machine': platform.machine(),
+            'cpus': os.cpu_count(), 'platform': platform.platform()}
+
+
+def save_baseline(path, digest, results, args):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'environment': environment(), 'seed': args.seed, 'repeat': args.repeat,
+                   'corpus': digest, 'results': results}, f, indent=2)
+
+
+def compare(baseline, results, threshold):
+    """Print throughput change per case; returns the names that regressed
+    by more than ``threshold`` (a fraction)."""
+    regressed = []
+    print(f"\n{'case':42} {'baseline':>10} {'now':>10} {'change':>8}")
+    for name, now in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:42} {'-':>10} {now['mb_s']:10.2f} {'new':>8}")
+            continue
+        change = now['mb_s'] / before['mb_s'] - 1
+        flag = ''
+        if change < -threshold:
+            flag = '  REGRESSION'
+            regressed.append(name)
+        print(f"{name:42} {before['mb_s']:10.2f} {now['mb_s']:10.2f} {change:+8.1%}{flag}")
+    return regressed
+
+
+# ── CLI ──────────────────────────────────────────────────────────────
+
+def _int_list(value):
+    return [int(part) for part in value.split(',') if part]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark fix_dark_mode.py and the update_admin_modal.py patch engine '
+                    'on a generated TSX corpus.')
+    parser.add_argument('--sizes', type=_int_list, default=[25, 100],
+                        help='corpus sizes in files, comma-separated (default: 25,100)')
+    parser.add_argument('--jobs', type=_int_list, default=sorted({1, os.cpu_count() or 1}),
+                        help='worker counts to try, comma-separated (default: 1 and CPU count)')
+    parser.add_argument('--modes', type=lambda v: v.split(','), default=['substring', 'tokens'],
+                        help='rewrite modes, comma-separated (default: substring,tokens)')
+    parser.add_argument('--scope', choices=('classes', 'file'), default='classes',
+                        help='fix_dark_mode.py --scope to benchmark (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='runs per case; the fastest counts (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0, help='corpus seed (default: %(default)s)')
+    parser.add_argument('--save', nargs='?', const=BASELINE_FILE, type=Path, metavar='PATH',
+                        help=f'save results as a baseline (default PATH: {BASELINE_FILE})')
+    parser.add_argument('--compare', nargs='?', const=BASELINE_FILE, type=Path, metavar='PATH',
+                        help='compare against a saved baseline and exit 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='throughput drop that counts as a regression (default: %(default)s)')
+    parser.add_argument('--generate', type=Path, metavar='DIR',
+                        help='only write the largest corpus to DIR and exit')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.generate:
+        files = generate_corpus(args.generate, max(args.sizes), args.seed)
+        print(f"Wrote {len(files)} files to {args.generate}")
+        return
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print(f"Benchmarking on {environment()['platform']}, {os.cpu_count()} CPUs", file=sys.stderr)
+    digest, results = run_suite(args)
+    if baseline is not None and baseline.get('corpus') != digest:
+        # Different seed or rule file: the numbers are not like for like
+        print("Warning: the baseline was measured on a different corpus", file=sys.stderr)
+    if args.save:
+        save_baseline(args.save, digest, results, args)
+        print(f"\nSaved baseline to {args.save}", file=sys.stderr)
+    if baseline is not None:
+        regressed = compare(baseline['results'], results, args.threshold)
+        if regressed:
+            sys.exit(f"\n{len(regressed)} cases regressed by more than {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
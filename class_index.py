@@ -0,0 +1,230 @@
+import argparse
+import json
+import os
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+
+from fix_dark_mode import ROOT, atomic_write, collect_files, load_rulesets, pool_map
+from tsx_lexer import class_spans
+
+INDEX_FILE = ROOT / '.cache' / 'class_index' / 'index.json'
+
+# A token that paints a light-theme neutral -- a pale surface or border, or
+# dark text -- and so needs a dark: counterpart.  White text and translucent
+# white overlays sit on coloured backgrounds and are left out.
+NEUTRAL = r'(?:slate|gray|zinc|neutral|stone)'
+LIGHT_COLOR = re.compile(
+    r'(?:[\w\[\]-]+:)*(?:'
+    rf'(?:bg|border(?:-[trblxy])?|divide|ring|outline)-(?:white|{NEUTRAL}-(?:50|100|200|300)(?:/\d+)?)'
+    rf'|text-(?:black|{NEUTRAL}-(?:[4-9]00|950))(?:/\d+)?)')
+
+
+# ── SCANNING ─────────────────────────────────────────────────────────
+
+def normalize(value):
+    return ' '.join(value.split())
+
+
+def scan_file(path):
+    """``(path, size, mtime_ns, {class string: occurrences})`` for one file."""
+    # Stat before reading: an edit racing the read leaves a stale mtime
+    # behind, so the file is simply rescanned next time.
+    st = os.stat(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    classes = Counter()
+    for start, end in class_spans(text):
+        value = normalize(text[start:end])
+        if value:
+            classes[value] += 1
+    return path, st.st_size, st.st_mtime_ns, dict(classes)
+
+
+def scan_files(files, jobs):
+    """Yield scan_file results, spread over ``jobs`` processes."""
+    yield from pool_map(scan_file, files, jobs)
+
+
+# ── INDEX ────────────────────────────────────────────────────────────
+
+class ClassIndex:
+    """Class strings per file, cached by (size, mtime) between runs.
+
+    Entries are keyed by path relative to ``root``; only files whose size
+    or mtime changed since the last run are lexed again.
+    """
+
+    VERSION = 1
+
+    def __init__(self, root, entries=None):
+        self.root = Path(root)
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls, path, root):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(root)
+        if data.get('version') != cls.VERSION or data.get('root') != str(root):
+            return cls(root)
+        return cls(root, data.get('files', {}))
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(path, json.dumps({'version': self.VERSION, 'root': str(self.root),
+                                       'files': self.entries},
+                                      ensure_ascii=False).encode('utf-8'))
+
+    def _name(self, path):
+        return Path(path).relative_to(self.root).as_posix()
+
+    def update(self, files, jobs):
+        """Bring the index in line with ``files``; returns how many were rescanned."""
+        current = {}
+        stale = []
+        for path in files:
+            name = self._name(path)
+            entry = self.entries.get(name)
+            st = os.stat(path)
+            if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+                current[name] = entry
+            else:
+                stale.append(path)
+        for path, size, mtime_ns, classes in scan_files(stale, jobs):
+            current[self._name(path)] = [size, mtime_ns, classes]
+        self.entries = current
+        return len(stale)
+
+    def by_class(self):
+        """Inverted index: class string -> {file: occurrences}."""
+        index = {}
+        for name, (_, _, classes) in self.entries.items():
+            for value, count in classes.items():
+                index.setdefault(value, {})[name] = count
+        return index
+
+    def by_token(self):
+        """Inverted index: token -> {file: occurrences}."""
+        index = {}
+        for name, (_, _, classes) in self.entries.items():
+            for value, count in classes.items():
+                for token in value.split():
+                    files = index.setdefault(token, {})
+                    files[name] = files.get(name, 0) + count
+        return index
+
+
+# ── COVERAGE ─────────────────────────────────────────────────────────
+
+def is_light_only(value):
+    """True when ``value`` sets a neutral light colour and carries no dark: token."""
+    tokens = value.split()
+    if any(t.startswith('dark:') or ':dark:' in t for t in tokens):
+        return False
+    return any(LIGHT_COLOR.fullmatch(t) for t in tokens)
+
+
+def coverage(by_class, rulesets):
+    """Light-only class strings ranked by occurrences, most frequent first.
+
+    A string is ``covered`` when some rule set would add a dark: variant to
+    it (judged in token mode, so quoting and token order do not matter).
+    """
+    rows = []
+    for value, files in by_class.items():
+        if not is_light_only(value):
+            continue
+        covered = [rs.name for rs in rulesets
+                   if rs.rewriter.rewrite_class(value) != value]
+        rows.append({'class': value, 'occurrences': sum(files.values()),
+                     'files': sorted(files), 'covered_by': covered})
+    rows.sort(key=lambda row: (-row['occurrences'], row['class']))
+    return rows
+
+
+def token_ranking(rows):
+    """Tokens of the uncovered light-only strings, weighted by occurrences."""
+    counts = Counter()
+    for row in rows:
+        if not row['covered_by']:
+            for token in set(row['class'].split()):
+                counts[token] += row['occurrences']
+    return counts
+
+
+# ── CLI ──────────────────────────────────────────────────────────────
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Index class strings across TSX files and report light-only ones.')
+    parser.add_argument('root', nargs='?', type=Path, default=ROOT / 'src',
+                        help='directory to index (default: %(default)s)')
+    parser.add_argument('--top', type=int, default=25,
+                        help='how many class strings and tokens to list (default: %(default)s)')
+    parser.add_argument('--uncovered', action='store_true',
+                        help='only list class strings no rule set covers')
+    parser.add_argument('--class', dest='lookup_class', metavar='VALUE',
+                        help='list the files using this exact class string')
+    parser.add_argument('--token', metavar='TOKEN',
+                        help='list the files using this class token')
+    parser.add_argument('--json', type=Path, metavar='PATH',
+                        help='also write the full light-only report as JSON')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='worker processes for rescanned files (default: CPU count)')
+    return parser.parse_args(argv)
+
+
+def _print_files(title, files):
+    print(title)
+    for name, count in sorted(files.items(), key=lambda item: (-item[1], item[0])):
+        print(f"  {count:5}  {name}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    root = args.root.resolve()
+    files = collect_files(root, ['**/*.tsx'], [])
+
+    index = ClassIndex.load(INDEX_FILE, root)
+    known = len(index.entries)
+    rescanned = index.update(files, args.jobs)
+    if rescanned or len(index.entries) != known:
+        index.save(INDEX_FILE)
+    by_class = index.by_class()
+    print(f"Indexed {len(files)} files ({rescanned} rescanned), "
+          f"{len(by_class)} distinct class strings", file=sys.stderr)
+
+    if args.lookup_class is not None:
+        _print_files(f"Files using {args.lookup_class!r}:",
+                     by_class.get(normalize(args.lookup_class), {}))
+        return
+    if args.token is not None:
+        _print_files(f"Files using token {args.token!r}:", index.by_token().get(args.token, {}))
+        return
+
+    rulesets = list(load_rulesets(mode='tokens').values())
+    rows = coverage(by_class, rulesets)
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'light_only': rows, 'uncovered_tokens': token_ranking(rows)},
+                      f, ensure_ascii=False, indent=2)
+
+    uncovered = [row for row in rows if not row['covered_by']]
+    print(f"\nLight-only class strings: {len(rows)} ({len(uncovered)} not covered by any rule)")
+    for row in (uncovered if args.uncovered else rows)[:args.top]:
+        mark = 'covered' if row['covered_by'] else 'MISSING'
+        print(f"  {row['occurrences']:5}x {len(row['files']):3} files  {mark:7}  {row['class']}")
+
+    print("\nMost frequent tokens in uncovered light-only strings:")
+    for token, count in token_ranking(rows).most_common(args.top):
+        print(f"  {count:5}x  {token}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,337 @@
+import re
+
+from tsx_lexer import WHITESPACE, class_spans, pieces, with_quotes
+
+# Class normalizer for fix_dark_mode.py --normalize.  Substring rules
+# cascade, so their output can carry the same token twice (two
+# dark:border-white/10) or two tokens that set the same property under the
+# same variants (dark:bg-[#1E1E1E] and dark:bg-[#2A2A2A]).  With --normalize
+# a final stage drops the repeats and, per conflict, every token but the
+# last one (the usual "last class wins" reading, as in tailwind-merge; the
+# browser itself goes by stylesheet order, so conflicts written by hand are
+# worth a look in --dry-run first).  Tokens are grouped by the table below;
+# a token it does not know is only ever de-duplicated, never dropped for a
+# conflict.
+
+# Colours from tailwind.config.js (theme colours and the daisyUI theme) on
+# top of Tailwind's palette
+THEME_COLORS = (
+    'shibl-crimson', 'shibl-crimson-dark', 'shibl-crimson-light', 'charcoal', 'soft-cloud',
+    'slate-grey', 'success-green',
+    'primary', 'primary-content', 'secondary', 'secondary-content', 'accent',
+    'accent-content', 'neutral', 'neutral-content', 'base-100', 'base-200', 'base-300',
+    'base-content', 'info', 'info-content', 'success', 'success-content', 'warning',
+    'warning-content', 'error', 'error-content',
+)
+PALETTE = ('slate', 'gray', 'zinc', 'neutral', 'stone', 'red', 'orange', 'amber', 'yellow',
+           'lime', 'green', 'emerald', 'teal', 'cyan', 'sky', 'blue', 'indigo', 'violet',
+           'purple', 'fuchsia', 'pink', 'rose')
+
+_ARBITRARY = r'\[[^\]]+\]'
+_ARBITRARY_LENGTH = r'\[-?\d[^\]]*\]'
+_COLOR = (r'(?:(?:inherit|current|transparent|black|white'
+          rf'|(?:{"|".join(PALETTE)})-(?:50|[1-9]00|950)'
+          rf'|{"|".join(sorted(map(re.escape, THEME_COLORS), key=len, reverse=True))})'
+          rf'(?:/(?:\d+|{_ARBITRARY}))?'
+          r'|\[(?:#|rgba?\(|hsla?\(|color:|var\(--color)[^\]]*\](?:/\d+)?)')
+_WIDTH = rf'(?:0|1|2|4|8|{_ARBITRARY_LENGTH})'
+_SIDES = r'(?:x|y|t|r|b|l|s|e)'
+_CORNERS = r'(?:t|r|b|l|s|e|tl|tr|br|bl|ss|se|es|ee)'
+_ANY = r'(?:.+)'
+
+# (group, utility pattern).  Order matters where one prefix is shared by
+# several properties: the first pattern that matches the whole utility
+# decides its group.
+GROUPS = (
+    ('display', r'block|inline-block|inline|flex|inline-flex|grid|inline-grid|table'
+                r'|contents|flow-root|list-item|hidden'),
+    ('position', r'static|fixed|absolute|relative|sticky'),
+    ('visibility', r'visible|invisible|collapse'),
+    ('overflow', rf'overflow-(?!x-|y-){_ANY}'),
+    ('overflow-x', rf'overflow-x-{_ANY}'),
+    ('overflow-y', rf'overflow-y-{_ANY}'),
+    ('z-index', rf'z-{_ANY}'),
+    ('inset', rf'inset-(?!x-|y-){_ANY}'),
+    ('inset-x', rf'inset-x-{_ANY}'),
+    ('inset-y', rf'inset-y-{_ANY}'),
+    ('top', rf'top-{_ANY}'),
+    ('right', rf'right-{_ANY}'),
+    ('bottom', rf'bottom-{_ANY}'),
+    ('left', rf'left-{_ANY}'),
+    ('start', rf'start-{_ANY}'),
+    ('end', rf'end-{_ANY}'),
+    ('flex-direction', r'flex-(?:row|row-reverse|col|col-reverse)'),
+    ('flex-wrap', r'flex-(?:wrap|wrap-reverse|nowrap)'),
+    ('flex', rf'flex-(?:1|auto|initial|none|{_ARBITRARY})'),
+    ('grow', rf'(?:flex-)?grow(?:-{_ANY})?'),
+    ('shrink', rf'(?:flex-)?shrink(?:-{_ANY})?'),
+    ('basis', rf'basis-{_ANY}'),
+    ('order', rf'order-{_ANY}'),
+    ('grid-cols', rf'grid-cols-{_ANY}'),
+    ('grid-rows', rf'grid-rows-{_ANY}'),
+    ('col-span', rf'col-(?:span-{_ANY}|auto)'),
+    ('row-span', rf'row-(?:span-{_ANY}|auto)'),
+    ('gap', rf'gap-(?!x-|y-){_ANY}'),
+    ('gap-x', rf'gap-x-{_ANY}'),
+    ('gap-y', rf'gap-y-{_ANY}'),
+    ('justify-content', r'justify-(?:start|end|center|between|around|evenly|stretch|normal)'),
+    ('justify-items', rf'justify-items-{_ANY}'),
+    ('justify-self', rf'justify-self-{_ANY}'),
+    ('align-items', r'items-(?:start|end|center|baseline|stretch)'),
+    ('align-content', r'content-(?:start|end|center|between|around|evenly|stretch|normal)'),
+    ('align-self', r'self-(?:auto|start|end|center|stretch|baseline)'),
+    ('padding', rf'p-{_ANY}'),
+    ('padding-x', rf'px-{_ANY}'),
+    ('padding-y', rf'py-{_ANY}'),
+    ('padding-top', rf'pt-{_ANY}'),
+    ('padding-right', rf'pr-{_ANY}'),
+    ('padding-bottom', rf'pb-{_ANY}'),
+    ('padding-left', rf'pl-{_ANY}'),
+    ('padding-start', rf'ps-{_ANY}'),
+    ('padding-end', rf'pe-{_ANY}'),
+    ('margin', rf'm-{_ANY}'),
+    ('margin-x', rf'mx-{_ANY}'),
+    ('margin-y', rf'my-{_ANY}'),
+    ('margin-top', rf'mt-{_ANY}'),
+    ('margin-right', rf'mr-{_ANY}'),
+    ('margin-bottom', rf'mb-{_ANY}'),
+    ('margin-left', rf'ml-{_ANY}'),
+    ('margin-start', rf'ms-{_ANY}'),
+    ('margin-end', rf'me-{_ANY}'),
+    ('space-x', rf'space-x-(?!reverse){_ANY}'),
+    ('space-y', rf'space-y-(?!reverse){_ANY}'),
+    ('width', rf'w-{_ANY}'),
+    ('min-width', rf'min-w-{_ANY}'),
+    ('max-width', rf'max-w-{_ANY}'),
+    ('height', rf'h-{_ANY}'),
+    ('min-height', rf'min-h-{_ANY}'),
+    ('max-height', rf'max-h-{_ANY}'),
+    ('size', rf'size-{_ANY}'),
+    ('font-family', r'font-(?:sans|serif|mono|cairo|tajawal)'),
+    ('font-weight', r'font-(?:thin|extralight|light|normal|medium|semibold|bold|extrabold'
+                    rf'|black|{_ARBITRARY_LENGTH})'),
+    ('font-size', rf'text-(?:xs|sm|base|lg|xl|[2-9]xl|\[\d[\d.]*(?:px|r?em|%)\])'),
+    ('text-align', r'text-(?:left|center|right|justify|start|end)'),
+    ('text-color', rf'text-{_COLOR}'),
+    ('text-overflow', r'text-(?:ellipsis|clip)'),
+    ('line-height', rf'leading-{_ANY}'),
+    ('letter-spacing', rf'tracking-{_ANY}'),
+    ('text-transform', r'uppercase|lowercase|capitalize|normal-case'),
+    ('font-style', r'italic|not-italic'),
+    ('text-decoration-line', r'underline|overline|line-through|no-underline'),
+    ('whitespace', rf'whitespace-{_ANY}'),
+    ('line-clamp', rf'line-clamp-{_ANY}'),
+    ('bg-color', rf'bg-{_COLOR}'),
+    ('bg-opacity', rf'bg-opacity-{_ANY}'),
+    ('bg-image', rf'bg-(?:none|gradient-to-{_ANY})'),
+    ('bg-size', r'bg-(?:auto|cover|contain)'),
+    ('gradient-from', rf'from-{_COLOR}'),
+    ('gradient-via', rf'via-{_COLOR}'),
+    ('gradient-to', rf'to-{_COLOR}'),
+    ('rounded', rf'rounded(?:-(?!{_CORNERS}(?:-|$)){_ANY})?'),
+    ('rounded-corner', rf'rounded-{_CORNERS}(?:-{_ANY})?'),
+    ('border-width', rf'border(?:-{_WIDTH})?'),
+    ('border-width-side', rf'border-{_SIDES}(?:-{_WIDTH})?'),
+    ('border-color', rf'border-{_COLOR}'),
+    ('border-color-side', rf'border-{_SIDES}-{_COLOR}'),
+    ('border-style', r'border-(?:solid|dashed|dotted|double|hidden|none)'),
+    ('divide-x', rf'divide-x(?:-{_WIDTH})?'),
+    ('divide-y', rf'divide-y(?:-{_WIDTH})?'),
+    ('divide-color', rf'divide-{_COLOR}'),
+    ('ring-width', rf'ring(?:-{_WIDTH})?'),
+    ('ring-color', rf'ring-{_COLOR}'),
+    ('ring-offset-width', rf'ring-offset-(?:\d+|{_ARBITRARY_LENGTH})'),
+    ('ring-offset-color', rf'ring-offset-{_COLOR}'),
+    ('outline-style', r'outline-none|outline(?:-(?:dashed|dotted|double))?'),
+    ('outline-width', rf'outline-{_WIDTH}'),
+    ('outline-color', rf'outline-{_COLOR}'),
+    ('shadow', rf'shadow(?:-(?:sm|md|lg|xl|2xl|inner|none|card|card-hover|crimson'
+               rf'|crimson-lg|{_ARBITRARY_LENGTH}))?'),
+    ('shadow-color', rf'shadow-{_COLOR}'),
+    ('opacity', rf'opacity-{_ANY}'),
+    ('blur', rf'blur(?:-{_ANY})?'),
+    ('backdrop-blur', rf'backdrop-blur(?:-{_ANY})?'),
+    ('transition', rf'transition(?:-(?:all|colors|opacity|shadow|transform|none))?'),
+    ('duration', rf'duration-{_ANY}'),
+    ('ease', rf'ease-{_ANY}'),
+    ('delay', rf'delay-{_ANY}'),
+    ('animate', rf'animate-{_ANY}'),
+    ('scale', rf'scale-(?!x-|y-){_ANY}'),
+    ('rotate', rf'rotate-{_ANY}'),
+    ('translate-x', rf'translate-x-{_ANY}'),
+    ('translate-y', rf'translate-y-{_ANY}'),
+    ('cursor', rf'cursor-{_ANY}'),
+    ('user-select', rf'select-(?:none|text|all|auto)'),
+    ('pointer-events', r'pointer-events-(?:none|auto)'),
+    ('fill', rf'fill-(?:none|{_COLOR})'),
+    ('stroke-color', rf'stroke-(?:none|{_COLOR})'),
+    ('stroke-width', rf'stroke-(?:\d+|{_ARBITRARY_LENGTH})'),
+    ('placeholder-color', rf'placeholder-{_COLOR}'),
+    ('accent-color', rf'accent-{_COLOR}'),
+    ('caret-color', rf'caret-{_COLOR}'),
+    ('decoration-color', rf'decoration-{_COLOR}'),
+    ('object-fit', r'object-(?:contain|cover|fill|none|scale-down)'),
+    ('aspect', rf'aspect-{_ANY}'),
+)
+# The -side and -corner groups are keyed per side or corner as well
+_PER_SIDE = re.compile(r'(?:border|rounded)-([a-z]{1,2})\b')
+UTILITY_GROUP = re.compile('|'.join(f'(?P<g{i}>{pattern})'
+                                    for i, (_, pattern) in enumerate(GROUPS)))
+
+
+def _split_variants(token):
+    """``hover:[&>p]:bg-white`` -> ``(['hover', '[&>p]'], 'bg-white')``; colons
+    inside brackets (arbitrary values and variants) do not split."""
+    variants = []
+    depth = start = 0
+    for i, ch in enumerate(token):
+        if ch == '[':
+            depth += 1
+        elif ch == ']':
+            depth -= 1
+        elif ch == ':' and depth == 0:
+            variants.append(token[start:i])
+            start = i + 1
+    return variants, token[start:]
+
+
+def conflict_key(token):
+    """``(variants, important, group)`` for a token the group table knows, else None.
+
+    Variant order does not change what a token targets, so plain variants
+    are sorted; arbitrary ones (``[&>p]``) keep their order.
+    """
+    variants, utility = _split_variants(token)
+    important = utility.startswith('!') or utility.endswith('!')
+    utility = utility.strip('!').lstrip('-')
+    m = UTILITY_GROUP.fullmatch(utility)
+    if m is None:
+        return None
+    group = GROUPS[int(m.lastgroup[1:])][0]
+    if group.endswith(('-side', '-corner')):
+        group += ':' + _PER_SIDE.match(utility).group(1)
+    if not any(v.startswith('[') for v in variants):
+        variants = sorted(variants)
+    return tuple(variants), important, group
+
+
+class ClassNormalizer:
+    """Drops repeated and overridden tokens from class strings; same ``sub``
+    interface as fix_dark_mode.Matcher, so it runs as the last stage of a
+    pipeline.
+
+    Hits are counted under ``duplicate`` and ``conflict``.
+    """
+
+    rule_keys = ['duplicate', 'conflict']
+    prefilter = re.compile(rb'\bclassName=|\b(?:cn|clsx)\(')
+
+    def __init__(self):
+        self._cache = {}
+        self._byte_cache = {}
+        self._keys = {}
+
+    def could_match(self, buf):
+        return self.prefilter.search(buf) is not None
+
+    def _key(self, token):
+        key = self._keys.get(token, False)
+        if key is False:
+            key = self._keys[token] = conflict_key(token)
+        return key
+
+    def normalize_class(self, value, keep_first=False, keep_last=False):
+        """Normalize one class string (memoized).
+
+        ``keep_first``/``keep_last`` protect a token cut off by a template
+        interpolation (``text-${size}``), which is left as it is.
+        """
+        return self._normalize(value, keep_first, keep_last)[0]
+
+    def _normalize(self, value, keep_first, keep_last):
+        # -> (normalized value, (duplicates removed, conflicts removed))
+        cache_key = (value, keep_first, keep_last)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        parts = WHITESPACE.split(value)
+        tokens = parts[::2]
+        last = len(tokens) - 1
+        kept = []
+        seen = set()
+        winner = {}
+        duplicates = conflicts = 0
+        for i, token in enumerate(tokens):
+            if not token or (i == 0 and keep_first) or (i == last and keep_last):
+                kept.append(i)
+                continue
+            if token in seen:
+                duplicates += 1
+                continue
+            seen.add(token)
+            key = self._key(token)
+            if key in winner:
+                kept.remove(winner[key])
+                conflicts += 1
+            if key is not None:
+                winner[key] = i
+            kept.append(i)
+
+        if duplicates or conflicts:
+            # A dropped token takes the whitespace before it along, or the
+            # whitespace after it while no token precedes it, so leading,
+            # trailing and line-break layout survive
+            kept = set(kept)
+            dead = set()
+            survivor = False
+            for i, token in enumerate(tokens):
+                if i in kept:
+                    survivor = survivor or bool(token)
+                else:
+                    dead.update((2 * i, 2 * i - 1 if survivor else 2 * i + 1))
+            result = ''.join(part for i, part in enumerate(parts) if i not in dead)
+        else:
+            result = value
+        self._cache[cache_key] = cached = (result, (duplicates, conflicts))
+        return cached
+
+    def _normalize_bytes(self, value, keep_first, keep_last):
+        cache_key = (value, keep_first, keep_last)
+        cached = self._byte_cache.get(cache_key)
+        if cached is None:
+            result, counts = self._normalize(value.decode('utf-8'), keep_first, keep_last)
+            cached = self._byte_cache[cache_key] = (result.encode('utf-8'), counts)
+        return cached
+
+    def sub(self, text, hits=None, spans=None, edits=None):
+        """Normalize every class string; count removals into ``hits`` if given.
+
+        A string that does not sit directly between quotes borders a
+        template interpolation, and its token on that side is kept as is.
+        """
+        normalize = self._normalize if isinstance(text, str) else self._normalize_bytes
+        if spans is None:
+            spans = class_spans(text)
+        view, join = pieces(text)
+        out = []
+        pos = 0
+        for start, end in spans:
+            lo, hi = with_quotes(text, start, end)
+            value = text[start:end]
+            result, (duplicates, conflicts) = normalize(value, lo == start, hi == end)
+            if hits is not None:
+                if duplicates:
+                    hits['duplicate'] += duplicates
+                if conflicts:
+                    hits['conflict'] += conflicts
+            if result != value:
+                out.append(view[pos:start])
+                out.append(result)
+                if edits is not None:
+                    edits.append((start, end, len(result)))
+                pos = end
+        if not out:
+            return text
+        out.append(view[pos:])
+        return join(out)
@@ -1,162 +1,1667 @@
+import argparse
+import ctypes
+import difflib
+import fnmatch
+import gzip
+import hashlib
+import json
+import marshal
+import mmap
 import os
-import glob
-
-# Directory with admin pages
-base = r'D:\education\school web\Schoolweb\src\presentation\pages\admin'
-
-# Find all TSX files recursively (skip settings which is already done)
-files = glob.glob(os.path.join(base, '**', '*.tsx'), recursive=True)
-files = [f for f in files if 'AdminSettingsPage' not in f]
-
-print(f"Found {len(files)} files to process")
-
-# Common patterns and their dark mode replacements
-# Each tuple: (old, new)
-replacements = [
-    # ── CARD CONTAINERS ──────────────────────────────────────────────
-    ('bg-white rounded-[20px] shadow-card border border-slate-100 p-6',
-     'bg-white dark:bg-[#1E1E1E] rounded-[20px] shadow-card border border-slate-100 dark:border-white/10 p-6'),
-    ('bg-white rounded-[20px] shadow-card border border-slate-100 p-8',
-     'bg-white dark:bg-[#1E1E1E] rounded-[20px] shadow-card border border-slate-100 dark:border-white/10 p-8'),
-    ('bg-white rounded-[20px] shadow-card border border-slate-100',
-     'bg-white dark:bg-[#1E1E1E] rounded-[20px] shadow-card border border-slate-100 dark:border-white/10'),
-    # Table wrapper
-    ('bg-white rounded-[20px] border border-slate-100',
-     'bg-white dark:bg-[#1E1E1E] rounded-[20px] border border-slate-100 dark:border-white/10'),
-    # Simple white rounded
-    ('bg-white rounded-[20px]',
-     'bg-white dark:bg-[#1E1E1E] rounded-[20px]'),
-    # Simple white rounded-2xl
-    ('bg-white rounded-2xl shadow-card border border-slate-100',
-     'bg-white dark:bg-[#1E1E1E] rounded-2xl shadow-card border border-slate-100 dark:border-white/10'),
-    ('bg-white rounded-2xl',
-     'bg-white dark:bg-[#1E1E1E] rounded-2xl'),
-    # rounded-xl cards
-    ('bg-white rounded-xl border border-slate-100',
-     'bg-white dark:bg-[#1E1E1E] rounded-xl border border-slate-100 dark:border-white/10'),
-    ('bg-white rounded-xl',
-     'bg-white dark:bg-[#1E1E1E] rounded-xl'),
-    # shadow-sm cards
-    ('bg-white rounded-lg border border-slate-100 shadow-sm',
-     'bg-white dark:bg-[#1E1E1E] rounded-lg border border-slate-100 dark:border-white/10 shadow-sm'),
-    ('bg-white rounded-lg border border-slate-200',
-     'bg-white dark:bg-[#1E1E1E] rounded-lg border border-slate-200 dark:border-white/10'),
-    ('bg-white rounded-lg',
-     'bg-white dark:bg-[#1E1E1E] rounded-lg'),
-
-    # ── TABLE HEADERS ────────────────────────────────────────────────
-    ('bg-slate-50 border-b border-slate-100',
-     'bg-slate-50 dark:bg-[#2A2A2A] border-b border-slate-100 dark:border-white/10'),
-    ('bg-slate-50/80',
-     'bg-slate-50/80 dark:bg-white/5'),
-    ('bg-slate-50',
-     'bg-slate-50 dark:bg-[#2A2A2A]'),
-
-    # ── TABLE ROWS ───────────────────────────────────────────────────
-    ('border-b border-slate-50 hover:bg-slate-50',
-     'border-b border-slate-50 dark:border-white/5 hover:bg-slate-50 dark:hover:bg-white/5'),
-    ('border-b border-slate-100 hover:bg-slate-50',
-     'border-b border-slate-100 dark:border-white/10 hover:bg-slate-50 dark:hover:bg-white/5'),
-    ('divide-y divide-slate-100',
-     'divide-y divide-slate-100 dark:divide-white/10'),
-    ('divide-y divide-slate-50',
-     'divide-y divide-slate-50 dark:divide-white/5'),
-
-    # ── HEADING / TEXT ───────────────────────────────────────────────
-    ('text-charcoal font-bold',
-     'text-charcoal dark:text-white font-bold'),
-    ('font-bold text-charcoal',
-     'font-bold text-charcoal dark:text-white'),
-    ('text-xl font-bold text-charcoal',
-     'text-xl font-bold text-charcoal dark:text-white'),
-    ('text-2xl font-bold text-charcoal',
-     'text-2xl font-bold text-charcoal dark:text-white'),
-    ('text-lg font-bold text-charcoal',
-     'text-lg font-bold text-charcoal dark:text-white'),
-    ('text-sm font-bold text-charcoal',
-     'text-sm font-bold text-charcoal dark:text-white'),
-    ('font-semibold text-charcoal',
-     'font-semibold text-charcoal dark:text-white'),
-    ('text-charcoal text-sm',
-     'text-charcoal dark:text-white text-sm'),
-
-    # ── MUTED TEXT ───────────────────────────────────────────────────
-    ('text-slate-500 text-sm',
-     'text-slate-500 dark:text-slate-400 text-sm'),
-    ('text-sm text-slate-500',
-     'text-sm text-slate-500 dark:text-slate-400'),
-    ('text-slate-400 text-sm',
-     'text-slate-400 dark:text-slate-500 text-sm'),
-    ('text-slate-600 text-sm',
-     'text-slate-600 dark:text-slate-300 text-sm'),
-
-    # ── BORDERS ──────────────────────────────────────────────────────
-    ('border-b border-slate-100',
-     'border-b border-slate-100 dark:border-white/10'),
-    ('border border-slate-100',
-     'border border-slate-100 dark:border-white/10'),
-    ('border border-slate-200',
-     'border border-slate-200 dark:border-white/10'),
-
-    # ── LABELS ───────────────────────────────────────────────────────
-    ('block text-xs font-bold text-slate-600 mb-1.5',
-     'block text-xs font-bold text-slate-600 dark:text-slate-300 mb-1.5'),
-    ('block text-xs font-bold text-slate-600 mb-2',
-     'block text-xs font-bold text-slate-600 dark:text-slate-300 mb-2'),
-    ('block text-sm font-bold text-slate-600 mb-1.5',
-     'block text-sm font-bold text-slate-600 dark:text-slate-300 mb-1.5'),
-    ('block text-sm font-bold text-slate-600 mb-2',
-     'block text-sm font-bold text-slate-600 dark:text-slate-300 mb-2'),
-
-    # ── INPUTS ───────────────────────────────────────────────────────
-    ('h-11 px-4 rounded-[10px] border border-slate-200 focus:border-shibl-crimson focus:ring-4 focus:ring-shibl-crimson/10 outline-none text-sm font-medium"',
-     'h-11 px-4 rounded-[10px] border border-slate-200 dark:border-white/10 bg-white dark:bg-[#2A2A2A] text-charcoal dark:text-white placeholder:text-slate-400 dark:placeholder:text-slate-600 focus:border-shibl-crimson focus:ring-4 focus:ring-shibl-crimson/10 outline-none text-sm font-medium"'),
-    ('h-11 pr-12 pl-4 rounded-[10px] border border-slate-200 focus:border-shibl-crimson focus:ring-4 focus:ring-shibl-crimson/10 outline-none text-sm font-medium"',
-     'h-11 pr-12 pl-4 rounded-[10px] border border-slate-200 dark:border-white/10 bg-white dark:bg-[#2A2A2A] text-charcoal dark:text-white placeholder:text-slate-400 dark:placeholder:text-slate-600 focus:border-shibl-crimson focus:ring-4 focus:ring-shibl-crimson/10 outline-none text-sm font-medium"'),
-    ('rounded-[10px] border border-slate-200 focus:border-shibl-crimson outline-none text-sm font-medium appearance-none bg-white"',
-     'rounded-[10px] border border-slate-200 dark:border-white/10 bg-white dark:bg-[#2A2A2A] dark:text-white focus:border-shibl-crimson outline-none text-sm font-medium appearance-none"'),
-
-    # ── TABLE HEADER CELLS ───────────────────────────────────────────
-    ('text-xs font-bold text-slate-500 uppercase',
-     'text-xs font-bold text-slate-500 dark:text-slate-400 uppercase'),
-    ('text-xs text-slate-500 font-bold uppercase',
-     'text-xs text-slate-500 dark:text-slate-400 font-bold uppercase'),
-
-    # ── PAGE BACKGROUND ──────────────────────────────────────────────
-    ('min-h-screen bg-[#F8F9FA]',
-     'min-h-screen bg-[#F8F9FA] dark:bg-[#121212]'),
-    ('min-h-screen bg-soft-cloud',
-     'min-h-screen bg-soft-cloud dark:bg-[#121212]'),
-
-    # ── STAT CARDS ───────────────────────────────────────────────────
-    ('bg-white p-6 rounded-[20px]',
-     'bg-white dark:bg-[#1E1E1E] p-6 rounded-[20px]'),
-
-    # ── MODAL / DIALOG ───────────────────────────────────────────────
-    ('bg-white rounded-[20px] shadow-xl',
-     'bg-white dark:bg-[#1E1E1E] rounded-[20px] shadow-xl'),
-    ('bg-white rounded-[20px] p-6',
-     'bg-white dark:bg-[#1E1E1E] rounded-[20px] p-6'),
-    ('bg-white rounded-[20px] w-full',
-     'bg-white dark:bg-[#1E1E1E] rounded-[20px] w-full'),
-]
-
-total_changes = 0
-for filepath in files:
-    with open(filepath, 'r', encoding='utf-8') as f:
-        original = f.read()
-    
-    content = original
-    for old, new in replacements:
-        content = content.replace(old, new)
-    
-    if content != original:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
-        changes = sum(original.count(old) for old, _ in replacements)
-        print(f"  Updated: {os.path.basename(filepath)}")
-        total_changes += 1
+import pickle
+import re
+import select
+import shlex
+import signal
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import cached_property, partial
+from pathlib import Path
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python < 3.11
+    import tomli as tomllib
+
+from class_normalizer import GROUPS, ClassNormalizer
+from tsx_lexer import WHITESPACE, class_spans, pieces, with_quotes
+
+ROOT = Path(__file__).resolve().parent
+CACHE_DIR = ROOT / '.cache' / 'fix_dark_mode'
+RULES_FILE = ROOT / 'dark_mode_rules.toml'
+
+
+# ── MATCHER ──────────────────────────────────────────────────────────
+# All rule needles are merged into one trie, and the trie is emitted as a
+# single regex (shared prefixes become nested groups, a needle ending
+# mid-branch becomes a greedy optional group).  The regex engine then walks
+# the automaton once, left to right, and at every position prefers the
+# longest needle, so each file is scanned once no matter how many rules
+# there are and replacements never cascade into each other's output.
+
+def _trie_pattern(needles):
+    root = {}
+    for needle in needles:
+        node = root
+        for ch in needle:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def emit(node):
+        # Walk single-child chains iteratively and only recurse at branch
+        # points, so multi-kilobyte needles don't hit the recursion limit.
+        out = []
+        while True:
+            children = sorted((ch, child) for ch, child in node.items() if ch)
+            terminal = '' in node
+            if len(children) == 1 and not terminal:
+                ch, node = children[0]
+                out.append(re.escape(ch))
+                continue
+            if children:
+                group = '(?:' + '|'.join(re.escape(ch) + emit(child)
+                                         for ch, child in children) + ')'
+                out.append(group + '?' if terminal else group)
+            return ''.join(out)
+
+    return emit(root)
+
+
+class Matcher:
+    """Single-pass, leftmost-longest replacer for a list of (old, new) rules."""
+
+    def __init__(self, rules):
+        self.rules = []
+        # Matched text -> (rule key, replacement)
+        self.lookup = {}
+        for old, new in rules:
+            if old and old not in self.lookup:
+                self.lookup[old] = (old, new)
+                self.rules.append((old, new))
+        self.source = _trie_pattern(old for old, _ in self.rules)
+        self.byte_lookup = {old.encode('utf-8'): (old, new.encode('utf-8'))
+                            for old, new in self.rules}
+
+    # The regexes are compiled on first use and never pickled (see RULE
+    # FILES): a process only compiles the ones it runs, once
+
+    @cached_property
+    def pattern(self):
+        # An empty rule list must never match (an empty pattern matches everywhere)
+        return re.compile(self.source or r'(?!)')
+
+    @cached_property
+    def byte_pattern(self):
+        # Same automaton over raw UTF-8, for bytes input and the prefilter
+        return re.compile((self.source or r'(?!)').encode('utf-8'))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('pattern', None)
+        state.pop('byte_pattern', None)
+        return state
+
+    @property
+    def rule_keys(self):
+        return [old for old, _ in self.rules]
+
+    def could_match(self, buf):
+        return self.byte_pattern.search(buf) is not None
+
+    def sub(self, text, hits=None, spans=None, edits=None):
+        """Replace every match; count replacements per rule into ``hits`` if given.
+
+        ``text`` is a str, or UTF-8 bytes (bytes, mmap) for which the result
+        is bytes. With ``spans`` (content offsets from ``tsx_lexer.class_spans``),
+        only matches inside those class strings -- widened to their quotes,
+        which some rules anchor on -- are replaced. Each replacement is
+        appended to an ``edits`` list, if given, as ``(start, end, size)``:
+        ``text[start:end]`` became ``size`` units of output. Returns ``text``
+        itself when nothing matched.
+        """
+        if isinstance(text, str):
+            pattern, lookup = self.pattern, self.lookup
+        else:
+            pattern, lookup = self.byte_pattern, self.byte_lookup
+        if spans is None:
+            windows = [(0, len(text))]
+        else:
+            windows = (with_quotes(text, start, end) for start, end in spans)
+        view, join = pieces(text)
+        out = []
+        pos = 0
+        for lo, hi in windows:
+            for m in pattern.finditer(text, max(lo, pos), hi):
+                key, new = lookup[m.group()]
+                if hits is not None:
+                    hits[key] += 1
+                out.append(view[pos:m.start()])
+                out.append(new)
+                if edits is not None:
+                    edits.append((m.start(), m.end(), len(new)))
+                pos = m.end()
+        if not out:
+            return text
+        out.append(view[pos:])
+        return join(out)
+
+
+# ── TOKEN MODE ───────────────────────────────────────────────────────
+# Instead of rewriting raw substrings, every className value is split into
+# tokens and each rule becomes "when all of these tokens are present, add
+# the variants that are missing".  A variant is also considered present when
+# the class already carries a token for the same variant/utility slot
+# (e.g. any dark:bg-*), so already-dark markup is left as it is and a second
+# run never appends anything twice.
+
+def _slot(token):
+    """``dark:hover:bg-white/5`` -> ``dark:hover:bg``."""
+    variants, _, utility = token.rpartition(':')
+    return variants + ':' + utility.lstrip('-!').split('-', 1)[0]
+
+
+# Substring rules anchor on the quotes around a class string (the same
+# quotes with_quotes widens spans to); tokens never include them
+_UNQUOTE = str.maketrans('"\'`', '   ')
+
+
+def token_rules(rules):
+    """Turn (old, new) substring rules into (old, required tokens, [(anchor, token)])."""
+    compiled = []
+    for old, new in rules:
+        required = old.translate(_UNQUOTE).split()
+        added = []
+        seen = set(required)
+        previous = None
+        for token in new.translate(_UNQUOTE).split():
+            if token not in seen:
+                added.append((previous, token))
+                seen.add(token)
+            previous = token
+        if required and added:
+            compiled.append((old, frozenset(required), added))
+    # Most specific rules first so their placement wins
+    compiled.sort(key=lambda rule: -len(rule[1]))
+    return compiled
+
+
+class TokenRewriter:
+    """Idempotent className rewriter; same ``sub`` interface as Matcher."""
+
+    def __init__(self, rules):
+        self.rules = token_rules(rules)
+        self._cache = {}
+        self._byte_cache = {}
+        # A rule can only fire where all of its tokens occur, so a file that
+        # contains none of the rules' longest tokens cannot change.
+        keys = sorted({max(required, key=len) for _, required, _ in self.rules})
+        self.prefilter_source = _trie_pattern(keys)
+
+    @cached_property
+    def prefilter(self):
+        # Compiled on first use and never pickled, like Matcher's patterns
+        return re.compile((self.prefilter_source or r'(?!)').encode('utf-8'))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('prefilter', None)
+        return state
+
+    @property
+    def rule_keys(self):
+        return [key for key, _, _ in self.rules]
+
+    def could_match(self, buf):
+        return self.prefilter.search(buf) is not None
+
+    def rewrite_class(self, value):
+        """Rewrite one whitespace-separated class string (memoized)."""
+        return self._rewrite(value)[0]
+
+    def _rewrite(self, value):
+        # -> (rewritten value, keys of the rules that added something)
+        cached = self._cache.get(value)
+        if cached is not None:
+            return cached
+
+        parts = WHITESPACE.split(value)
+        tokens = parts[::2]
+        present = set(tokens)
+        slots = {_slot(t) for t in present if ':' in t}
+        inserts = {}
+        fired = []
+        for key, required, added in self.rules:
+            if not required <= present:
+                continue
+            for anchor, token in added:
+                if token in present or (':' in token and _slot(token) in slots):
+                    continue
+                present.add(token)
+                if ':' in token:
+                    slots.add(_slot(token))
+                inserts.setdefault(anchor, []).append(token)
+                if not fired or fired[-1] != key:
+                    fired.append(key)
+
+        if inserts:
+            out = []
+            for i, part in enumerate(parts):
+                out.append(part)
+                if i % 2 == 0 and part in inserts:
+                    out.append(' ' + ' '.join(inserts.pop(part)))
+            leftover = [t for tokens in inserts.values() for t in tokens]
+            if leftover:
+                out.append(' ' + ' '.join(leftover))
+            result = ''.join(out)
+        else:
+            result = value
+        self._cache[value] = cached = (result, tuple(fired))
+        return cached
+
+    def _rewrite_bytes(self, value):
+        # Only the class string itself is decoded, never the whole file
+        cached = self._byte_cache.get(value)
+        if cached is None:
+            result, fired = self._rewrite(value.decode('utf-8'))
+            cached = self._byte_cache[value] = (result.encode('utf-8'), fired)
+        return cached
+
+    def sub(self, text, hits=None, spans=None, edits=None):
+        """Rewrite every class string; count rule firings into ``hits`` if given.
+
+        Like Matcher.sub, accepts str or UTF-8 bytes, reports ``edits`` and
+        returns ``text`` itself when nothing changed.
+        """
+        rewrite = self._rewrite if isinstance(text, str) else self._rewrite_bytes
+        if spans is None:
+            spans = class_spans(text)
+        view, join = pieces(text)
+        out = []
+        pos = 0
+        for start, end in spans:
+            value = text[start:end]
+            result, fired = rewrite(value)
+            if hits is not None:
+                hits.update(fired)
+            if result != value:
+                out.append(view[pos:start])
+                out.append(result)
+                if edits is not None:
+                    edits.append((start, end, len(result)))
+                pos = end
+        if not out:
+            return text
+        out.append(view[pos:])
+        return join(out)
+
+
+MODES = {'substring': Matcher, 'tokens': TokenRewriter}
+
+
+# ── RULE FILES ───────────────────────────────────────────────────────
+# Rule sets live in dark_mode_rules.toml.  Parsing them and building the
+# needle tries is done once per version of that file: the rewriters are
+# pickled under CACHE_DIR, keyed by the file's path, content hash, the mode
+# and the rewriting code, and later runs load them.  The re module cannot
+# persist a compiled regex (unpickling one compiles it again), so the
+# rewriters are pickled with their pattern sources only and every process
+# compiles a pattern when it first uses it.
+
+RuleSet = namedtuple('RuleSet', 'name include exclude rewriter digest')
+
+
+def code_digest():
+    """Hash of the modules that define how rules rewrite text."""
+    h = hashlib.sha256()
+    for name in ('fix_dark_mode.py', 'tsx_lexer.py', 'class_normalizer.py'):
+        h.update((ROOT / name).read_bytes())
+    return h.hexdigest()
+
+
+def _parse_rulesets(text, mode):
+    data = tomllib.loads(text)
+    rulesets = {}
+    for entry in data.get('ruleset', []):
+        name = entry.get('name')
+        if not name or name in rulesets:
+            raise ValueError(f"rule set names must be unique and non-empty: {name!r}")
+        rules = []
+        for rule in entry.get('rules', []):
+            if len(rule) != 2 or not all(isinstance(part, str) for part in rule):
+                raise ValueError(f"rule set {name!r}: rules must be [old, new] string pairs, got {rule!r}")
+            rules.append(tuple(rule))
+        rulesets[name] = RuleSet(name, entry.get('include', ['**/*.tsx']),
+                                 entry.get('exclude', []), MODES[mode](rules),
+                                 rules_digest(rules, mode))
+    return rulesets
+
+
+def load_rulesets(path=RULES_FILE, mode='substring'):
+    """Compiled rule sets from ``path`` as an ordered ``{name: RuleSet}`` dict."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    # Each rule file has its own cache, so switching between rule files
+    # does not throw the other one's away
+    source = content_digest(str(Path(path).resolve()).encode('utf-8'))[:8]
+    key = content_digest(raw + code_digest().encode('ascii'))[:16]
+    cache = CACHE_DIR / f'rules-{mode}-{source}-{key}.pickle'
+    try:
+        with open(cache, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, EOFError, AttributeError, pickle.UnpicklingError):
+        pass
+
+    rulesets = _parse_rulesets(raw.decode('utf-8'), mode)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    for stale in CACHE_DIR.glob(f'rules-{mode}-{source}-*.pickle'):
+        stale.unlink(missing_ok=True)
+    atomic_write(cache, pickle.dumps(rulesets, protocol=pickle.HIGHEST_PROTOCOL))
+    return rulesets
+
+
+def normalizer_ruleset():
+    """The class normalizer as a rule set, to run after the ones from the rule file."""
+    return RuleSet('normalize', ['**/*.tsx'], [], ClassNormalizer(),
+                   content_digest(json.dumps(GROUPS).encode('utf-8')))
+
+
+# ── FILE SELECTION ───────────────────────────────────────────────────
+
+def collect_files(root, include, exclude):
+    """Files under ``root`` matching any ``include`` glob and no ``exclude`` glob."""
+    root = Path(root)
+    found = set()
+    for pattern in include:
+        found.update(p for p in root.glob(pattern) if p.is_file())
+
+    def excluded(path):
+        rel = path.relative_to(root).as_posix()
+        return any(fnmatch.fnmatch(rel, pat) or fnmatch.fnmatch(path.name, pat)
+                   for pat in exclude)
+
+    return sorted(p for p in found if not excluded(p))
+
+
+def plan_files(root, rulesets, include=None, exclude=()):
+    """Map each file to the rule sets (in rule-file order) that target it.
+
+    Rule sets select files with their own include/exclude globs, relative to
+    ``root``; ``include`` overrides those globs for every rule set and
+    ``exclude`` is added to them.
+    """
+    plan = {}
+    for ruleset in rulesets:
+        files = collect_files(root, include or ruleset.include,
+                              list(ruleset.exclude) + list(exclude))
+        for path in files:
+            plan.setdefault(path, []).append(ruleset)
+    return {path: plan[path] for path in sorted(plan)}
+
+
+# ── REWRITING ────────────────────────────────────────────────────────
+
+# State of a file after it has been processed; size/mtime/digest describe
+# what is on disk now, so the manifest can recognise it next time.  In a dry
+# run ``changed`` means "would change", ``hits`` counts replacements per rule,
+# ``diff`` holds the unified diff and ``inserted``/``removed`` count the
+# bytes the rules insert and remove (an equal-length replacement counts
+# both ways).
+# ``timings`` is only filled in when profiling (see Profile).
+# ``cached`` is set when the output came from the OutputStore.  When
+# journaling, ``edits`` is ``(pre-image digest, journal_edits())`` for a
+# rewritten file.
+FileResult = namedtuple('FileResult',
+                        'path changed size mtime_ns digest hits diff inserted removed timings '
+                        'cached edits',
+                        defaults=(None, None, 0, 0, None, False, None))
+
+
+def content_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+@contextmanager
+def _mapped(path):
+    """Read-only mmap of ``path`` (``b''`` for an empty file, which cannot be mapped)."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            yield buf
+
+
+def _unified_diff(path, original, content):
+    name = Path(path).as_posix()
+    return ''.join(difflib.unified_diff(
+        original.splitlines(keepends=True), content.splitlines(keepends=True),
+        fromfile='a/' + name, tofile='b/' + name))
+
+
+def atomic_write(path, data):
+    """Replace ``path`` with ``data`` via a temp file and rename, so readers
+    never see a half-written file."""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.' + path.name + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        if path.exists():
+            os.chmod(tmp, os.stat(path).st_mode & 0o7777)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def compose_edits(first, second):
+    """Edits taking A to C, given ``first`` (A to B) and ``second`` (B to C).
+
+    Edits are sorted, disjoint ``(start, end, size)`` triples as reported by
+    the rewriters' ``sub``. Edits that overlap or touch in B -- a rule set
+    rewriting what an earlier one wrote -- merge into one.
+    """
+    # Both lists as B ranges, with how much each grows B (over A) and C (over B)
+    ranges = []
+    shift = 0
+    for start, end, size in first:
+        ranges.append((start + shift, start + shift + size, size - (end - start), 0))
+        shift += size - (end - start)
+    ranges.extend((start, end, 0, size - (end - start)) for start, end, size in second)
+    ranges.sort()
+
+    groups = []
+    for start, end, grow_b, grow_c in ranges:
+        if groups and start <= groups[-1][1]:
+            group = groups[-1]
+            group[1] = max(group[1], end)
+            group[2] += grow_b
+            group[3] += grow_c
+        else:
+            groups.append([start, end, grow_b, grow_c])
+
+    composed = []
+    shift = 0  # len(B) - len(A) before the current group
+    for lo, hi, grow_b, grow_c in groups:
+        composed.append((lo - shift, hi - shift - grow_b, hi - lo + grow_c))
+        shift += grow_b
+    return composed
+
+
+def apply_rulesets(content, rulesets, scope='classes', hits=None, timings=None, edits=None):
+    """Run ``rulesets`` over ``content`` in order and return the result.
+
+    ``content`` is a str, or UTF-8 bytes (bytes, mmap) for which the result
+    is bytes -- ``content`` itself when no rule set changed anything.
+    Replacements are counted into ``hits`` (a Counter) under
+    ``(rule set name, rule key)`` when it is given. With a ``timings`` dict,
+    seconds spent lexing and in each rule set are added to it. An ``edits``
+    list receives the edits of all rule sets, composed into offsets into
+    ``content`` (see compose_edits).
+    """
+    spans = None
+    for ruleset in rulesets:
+        counter = Counter() if hits is not None else None
+        stage = [] if edits is not None else None
+        if scope == 'classes' and spans is None:
+            start = time.perf_counter() if timings is not None else 0.0
+            spans = list(class_spans(content))
+            if timings is not None:
+                timings['lex'] += time.perf_counter() - start
+        start = time.perf_counter() if timings is not None else 0.0
+        rewritten = ruleset.rewriter.sub(content, counter, spans, stage)
+        if timings is not None:
+            timings['rulesets'][ruleset.name] = time.perf_counter() - start
+        if rewritten is not content:
+            # Offsets are stale once a rule set has changed the text
+            content = rewritten
+            spans = None
+            if edits is not None:
+                edits[:] = compose_edits(edits, stage)
+        if counter:
+            hits.update({(ruleset.name, key): n for key, n in counter.items()})
+    return content
+
+
+def _rule_scan_times(text, rulesets):
+    # All rules of a set are matched in one regex pass, so a single rule's
+    # cost is measured as scanning the text for its needle on its own
+    times = {}
+    for ruleset in rulesets:
+        for key in ruleset.rewriter.rule_keys:
+            needle = key if isinstance(text, str) else key.encode('utf-8')
+            start = time.perf_counter()
+            text.count(needle)
+            times[(ruleset.name, key)] = time.perf_counter() - start
+    return times
+
+
+def rewrite_file(path, rulesets, known_digest=None, dry_run=False, scope='classes',
+                 profile=False, store=None, journal=False):
+    """Apply ``rulesets`` in order to one file and describe its resulting state.
+
+    The file is mapped into memory and processed as raw UTF-8: hashing,
+    the needle prefilter, lexing and the rule sets all run over the mmap,
+    and the output is assembled from slices of it, so the file is never
+    decoded or copied whole. Only files whose content changes are written,
+    once. With ``scope='classes'`` the rules only see the class strings
+    found by tsx_lexer; ``'file'`` matches across the whole text. When
+    ``known_digest`` matches the current content the file is already in its
+    rewritten state and is left alone. With ``dry_run`` nothing is written
+    and the diff is returned instead. With ``profile`` the result carries
+    per-phase timings and per-rule hits. A ``store`` (OutputStore) supplies
+    outputs computed earlier for the same content and rules, and records
+    new ones; it is bypassed by dry runs and profiling, which need the
+    per-rule hits. With ``journal`` a rewritten file's edits, as reported
+    by the rewriters (or kept with the stored output), are returned for the
+    run's Journal.
+    """
+    clock = time.perf_counter
+    timings = None
+    if profile:
+        timings = {'read': 0.0, 'lex': 0.0, 'rewrite': 0.0, 'write': 0.0,
+                   'rulesets': {}, 'rules': {}}
+        begin = clock()
+    if store is not None and (dry_run or profile):
+        store = None
+
+    hits = Counter() if dry_run or profile else None
+    diff = None
+    inserted = removed = 0
+    data = None  # the new content, when it differs
+    key = cached = edits = None
+    changes = None  # compose_edits() edits from the original to ``data``
+    with _mapped(path) as buf:
+        digest = content_digest(buf)
+        # Files already rewritten or without any rule needle cannot change
+        candidate = digest != known_digest and any(
+            rs.rewriter.could_match(buf) for rs in rulesets)
+        if profile:
+            timings['read'] = clock() - begin
+        if candidate and store is not None:
+            key = store.key(digest, rulesets, scope)
+            cached = store.get(key)
+        if cached is not None:
+            if cached is not UNCHANGED:
+                data, changes = cached
+        elif candidate:
+            if journal or dry_run or key is not None:
+                changes = []
+            if profile:
+                start = clock()
+            content = apply_rulesets(buf, rulesets, scope, hits, timings, changes)
+            if profile:
+                timings['rewrite'] = clock() - start - timings['lex']
+                rules_start = clock()
+                timings['rules'] = _rule_scan_times(buf[:], rulesets)
+                # The per-rule scans are diagnostics, not part of the measured run
+                begin += clock() - rules_start
+            # A rule may also replace a needle with itself
+            if content is not buf and content_digest(content) != digest:
+                data = content
+            if key is not None:
+                store.put(key, UNCHANGED if data is None else data, changes)
+            if dry_run and data is not None:
+                diff = _unified_diff(path, buf[:].decode('utf-8'), data.decode('utf-8'))
+        if data is not None and (journal or dry_run):
+            narrowed = journal_edits(buf, data, changes)
+            if dry_run:
+                inserted = sum(len(new) for _, _, new in narrowed)
+                removed = sum(len(old) for _, old, _ in narrowed)
+            else:
+                edits = (digest, narrowed)
+
+    if data is not None and not dry_run:
+        if profile:
+            start = clock()
+        atomic_write(path, data)
+        if profile:
+            timings['write'] = clock() - start
+        digest = content_digest(data)
+
+    st = os.stat(path)
+    if profile:
+        timings['total'] = clock() - begin
+    return FileResult(path, data is not None, st.st_size, st.st_mtime_ns, digest,
+                      dict(hits) if hits else None, diff, inserted, removed, timings,
+                      cached is not None, edits)
+
+
+def pool_map(fn, tasks, jobs, initializer=None, initargs=()):
+    """Yield ``fn(task)`` for every task, in order, spread over ``jobs`` processes.
+
+    With one job or one task everything runs in this process, after
+    calling ``initializer`` here as a worker would.
+    """
+    tasks = list(tasks)
+    if jobs <= 1 or len(tasks) <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        yield from map(fn, tasks)
+        return
+    chunksize = max(1, len(tasks) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=initializer,
+                             initargs=initargs) as pool:
+        yield from pool.map(fn, tasks, chunksize=chunksize)
+
+
+# Each worker process receives the compiled rule sets once, in the pool
+# initializer; tasks only carry the indices of the rule sets to apply.
+_worker_rulesets = None
+
+
+def _init_worker(rulesets):
+    global _worker_rulesets
+    _worker_rulesets = rulesets
+
+
+def _rewrite_in_worker(task):
+    path, indices, known_digest, dry_run, scope, profile, store, journal = task
+    return rewrite_file(path, [_worker_rulesets[i] for i in indices], known_digest,
+                        dry_run, scope, profile, store, journal)
+
+
+def rewrite_files(plan, jobs, known_digests=None, dry_run=False, scope='classes',
+                  profile=False, store=None, journal=False):
+    """Yield a FileResult for every file in ``plan`` ({path: [RuleSet]}),
+    spreading work over ``jobs`` processes."""
+    known_digests = known_digests or {}
+    rulesets = []
+    for applied in plan.values():
+        rulesets.extend(rs for rs in applied if rs not in rulesets)
+    tasks = [(path, [rulesets.index(rs) for rs in applied], known_digests.get(path),
+              dry_run, scope, profile, store, journal)
+             for path, applied in plan.items()]
+    yield from pool_map(_rewrite_in_worker, tasks, jobs, _init_worker, (rulesets,))
+
+
+# ── INCREMENTAL MANIFEST ─────────────────────────────────────────────
+
+def rules_digest(rules, mode='substring'):
+    """Hash identifying a rule list; any edit to the rules invalidates the manifest."""
+    return content_digest(json.dumps([mode, list(rules)], ensure_ascii=False).encode('utf-8'))
+
+
+def pipeline_digest(rulesets, scope='classes'):
+    """Hash identifying what a run does to a file: its rule sets, in order, and the scope."""
+    return content_digest(
+        json.dumps([scope, [[rs.name, rs.digest] for rs in rulesets]]).encode('utf-8'))
+
+
+class Manifest:
+    """Per-file (size, mtime, content hash) recorded after the last run.
+
+    Entries are only trusted while the rule set hash they were written
+    with is still the active one.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path, rules_hash, entries=None):
+        self.path = Path(path)
+        self.rules_hash = rules_hash
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls, path, rules_hash):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path, rules_hash)
+        if data.get('version') != cls.VERSION or data.get('rules') != rules_hash:
+            return cls(path, rules_hash)
+        return cls(path, rules_hash, data.get('files', {}))
+
+    def is_fresh(self, path):
+        """True when ``path`` has not been touched since it was recorded."""
+        entry = self.entries.get(str(path))
+        if entry is None:
+            return False
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        return entry[0] == st.st_size and entry[1] == st.st_mtime_ns
+
+    def digest(self, path):
+        entry = self.entries.get(str(path))
+        return entry[2] if entry else None
+
+    def record(self, result):
+        self.entries[str(result.path)] = [result.size, result.mtime_ns, result.digest]
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(self.path, json.dumps({'version': self.VERSION, 'rules': self.rules_hash,
+                                            'files': self.entries}).encode('utf-8'))
+
+
+# ── OUTPUT STORE ─────────────────────────────────────────────────────
+# Worktrees and branches of the same frontend share most of their files
+# byte for byte.  The store maps (input content, rule pipeline, rewriter
+# code) to the rewritten output, or to a "no change" marker, in a
+# directory outside any one checkout, so a file rewritten in one worktree
+# is a hash lookup in the next.  Entries are written atomically, so
+# concurrent runs can share a store; a hit refreshes the entry's mtime and
+# prune() evicts least recently used entries once the store outgrows its
+# size budget.  An output is stored after a JSON line of the edits that
+# produced it, so outputs served from the store can still be journaled.
+
+UNCHANGED = object()  # marker: the rules leave the content as it is
+_ENTRY_UNCHANGED = b'='
+_ENTRY_OUTPUT = b'+'
+
+
+def default_store_dir():
+    """$FIX_DARK_MODE_STORE, else fix_dark_mode/store under the user cache directory."""
+    if os.environ.get('FIX_DARK_MODE_STORE'):
+        return Path(os.environ['FIX_DARK_MODE_STORE'])
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'fix_dark_mode' / 'store'
+
+
+class OutputStore:
+    """Content-addressed rewrite outputs under ``path``, shared between checkouts.
+
+    Instances are cheap to pickle (just the path and the code digest), so
+    they travel to worker processes with each task.
+    """
+
+    def __init__(self, path, max_bytes=256 << 20):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        # Output also depends on the rewriting code, which can differ
+        # between branches; any edit to it starts a fresh key space
+        self.code = code_digest()
+        self.pipelines = {}
+
+    def __getstate__(self):
+        return {'path': self.path, 'max_bytes': self.max_bytes, 'code': self.code}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state, pipelines={})
+
+    def key(self, digest, rulesets, scope='classes'):
+        """Store key for content ``digest`` run through ``rulesets`` with ``scope``."""
+        names = (scope, tuple(rs.digest for rs in rulesets))
+        pipeline = self.pipelines.get(names)
+        if pipeline is None:
+            pipeline = self.pipelines[names] = content_digest(
+                f'{self.code}:{pipeline_digest(rulesets, scope)}'.encode('ascii'))
+        return content_digest(f'{pipeline}:{digest}'.encode('ascii'))
+
+    def _entry(self, key):
+        return self.path / key[:2] / key[2:]
+
+    def get(self, key):
+        """``(output bytes, edits)``, UNCHANGED, or None when ``key`` is unknown."""
+        entry = self._entry(key)
+        try:
+            with open(entry, 'rb') as f:
+                data = f.read()
+            os.utime(entry)
+        except OSError:
+            return None
+        if data[:1] == _ENTRY_OUTPUT:
+            edits, _, output = data[1:].partition(b'\n')
+            try:
+                return output, json.loads(edits)
+            except ValueError:
+                return None
+        if data == _ENTRY_UNCHANGED:
+            return UNCHANGED
+        return None
+
+    def put(self, key, output, edits):
+        """Record ``output`` (bytes, or UNCHANGED) and the ``edits`` that
+        produced it under ``key``; failures are ignored."""
+        entry = self._entry(key)
+        if output is UNCHANGED:
+            data = _ENTRY_UNCHANGED
+        else:
+            data = _ENTRY_OUTPUT + json.dumps(edits).encode('ascii') + b'\n' + output
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write(entry, data)
+        except OSError:
+            pass
+
+    def prune(self):
+        """Evict least recently used entries until the store fits its budget.
+
+        Pruning goes down to 80% of ``max_bytes`` so that it does not run
+        again on every following run. Returns the number of entries removed.
+        """
+        entries = []
+        total = 0
+        try:
+            shards = [d for d in os.scandir(self.path) if d.is_dir()]
+        except OSError:
+            return 0
+        for shard in shards:
+            for entry in os.scandir(shard.path):
+                if entry.name.startswith('.'):
+                    continue  # another run's temp file
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, entry.path))
+                total += st.st_size
+        if total <= self.max_bytes:
+            return 0
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes * 0.8:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+
+# ── JOURNAL ──────────────────────────────────────────────────────────
+# Every run that rewrites files leaves a journal under JOURNAL_DIR: per
+# file the pre- and post-image hashes and the (offset, removed, inserted)
+# byte edits between them.  --revert RUN_ID undoes exactly those spans, so
+# unrelated work in the same files survives, and refuses any file that has
+# changed since.  Journals are gzip'd JSON lines; edit bytes are stored as
+# JSON strings, with lone surrogates (\udcXX escapes) for the bytes of a
+# character an edit splits.
+
+JOURNAL_DIR = CACHE_DIR / 'journal'
+JOURNAL_KEEP = 20
+
+
+def journal_edits(before, after, edits):
+    """``[(offset, removed, inserted)]`` turning ``before`` into ``after``.
+
+    ``edits`` are the compose_edits() triples between the two; each is
+    narrowed to the bytes that actually differ, and only those are sliced
+    out, so neither file is copied whole. Offsets are into ``before``.
+    """
+    narrowed = []
+    shift = 0
+    for start, end, size in edits:
+        old = before[start:end]
+        new = after[start + shift:start + shift + size]
+        shift += size - (end - start)
+        prefix = len(os.path.commonprefix([old, new]))
+        suffix = len(os.path.commonprefix([old[prefix:][::-1], new[prefix:][::-1]]))
+        old, new = old[prefix:len(old) - suffix], new[prefix:len(new) - suffix]
+        if old or new:
+            narrowed.append((start + prefix, old, new))
+    return narrowed
+
+
+def undo_edits(after, edits):
+    """Rebuild the pre-image from ``after`` and its ``journal_edits``, or raise
+    ValueError when the inserted bytes are not where they were put."""
+    view, join = pieces(after)
+    out = []
+    pos = shift = 0
+    for offset, removed, inserted in edits:
+        at = offset + shift
+        if view[at:at + len(inserted)] != inserted:
+            raise ValueError(f"edit at byte {offset} does not match")
+        out.append(view[pos:at])
+        out.append(removed)
+        pos = at + len(inserted)
+        shift += len(inserted) - len(removed)
+    out.append(view[pos:])
+    return join(out)
+
+
+def _edit_text(data):
+    return data.decode('utf-8', 'surrogateescape')
+
+
+def _edit_bytes(text):
+    return text.encode('utf-8', 'surrogateescape')
+
+
+class Journal:
+    """Edits of one run, written to ``JOURNAL_DIR/<run id>.jsonl.gz``.
+
+    The file is only created once a rewritten file is recorded, and only
+    appears under its final name when the journal is closed.
+    """
+
+    VERSION = 1
+
+    def __init__(self, directory=JOURNAL_DIR):
+        self.directory = Path(directory)
+        self.run_id = time.strftime('%Y%m%d-%H%M%S-') + os.urandom(2).hex()
+        self.files = 0
+        self._file = None
+        self._tmp = None
+
+    @staticmethod
+    def path_for(run_id, directory=JOURNAL_DIR):
+        return Path(directory) / f'{run_id}.jsonl.gz'
+
+    def _line(self, entry):
+        # ASCII-only JSON, so surrogate escapes survive as \udcXX
+        self._file.write(json.dumps(entry).encode('ascii') + b'\n')
+
+    def record(self, result):
+        if result.edits is None:
+            return
+        if self._file is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, self._tmp = tempfile.mkstemp(dir=self.directory, prefix='.' + self.run_id,
+                                             suffix='.tmp')
+            os.close(fd)
+            self._file = gzip.open(self._tmp, 'wb')
+            self._line({'version': self.VERSION, 'run': self.run_id, 'argv': sys.argv[1:]})
+        pre, edits = result.edits
+        # Absolute, so --revert works from any directory
+        self._line({'path': str(Path(result.path).resolve()), 'pre': pre, 'post': result.digest,
+                    'edits': [[offset, _edit_text(removed), _edit_text(inserted)]
+                              for offset, removed, inserted in edits]})
+        self.files += 1
+
+    def close(self):
+        """Finish the journal; returns the run id, or None when nothing was recorded."""
+        if self._file is None:
+            return None
+        self._file.close()
+        self._file = None
+        os.replace(self._tmp, self.path_for(self.run_id, self.directory))
+        journals = sorted(self.directory.glob('*.jsonl.gz'), key=os.path.getmtime)
+        for stale in journals[:-JOURNAL_KEEP]:
+            stale.unlink(missing_ok=True)
+        return self.run_id
+
+
+def revert_run(run_id, log, directory=JOURNAL_DIR):
+    """Undo the edits journaled for ``run_id``; returns the files refused.
+
+    A file is only reverted while its content is exactly what the run left
+    behind; files already back at their pre-image are skipped.
+    """
+    path = Journal.path_for(run_id, directory)
+    if not path.exists():
+        raise FileNotFoundError(f"no journal for run {run_id!r} in {directory}")
+    refused = []
+    reverted = 0
+    with gzip.open(path, 'rb') as f:
+        header = json.loads(f.readline())
+        if header.get('version') != Journal.VERSION:
+            raise ValueError(f"unsupported journal version in {path}")
+        for line in f:
+            entry = json.loads(line)
+            target = Path(entry['path'])
+            try:
+                with _mapped(target) as buf:
+                    digest = content_digest(buf)
+                    if digest == entry['pre']:
+                        log(f"  Already reverted: {target.name}")
+                        continue
+                    if digest != entry['post']:
+                        refused.append(target)
+                        log(f"  Refused (changed since run {run_id}): {target}")
+                        continue
+                    edits = [(offset, _edit_bytes(removed), _edit_bytes(inserted))
+                             for offset, removed, inserted in entry['edits']]
+                    data = undo_edits(buf, edits)
+            except OSError as e:
+                refused.append(target)
+                log(f"  Refused ({e.strerror or e}): {target}")
+                continue
+            if content_digest(data) != entry['pre']:
+                refused.append(target)
+                log(f"  Refused (journal does not reproduce the original): {target}")
+                continue
+            atomic_write(target, data)
+            reverted += 1
+            log(f"  Reverted: {target.name}")
+    log(f"\nReverted {reverted} files from run {run_id}.")
+    return refused
+
+
+# ── DRY-RUN REPORT ───────────────────────────────────────────────────
+
+def _display_name(path, root):
+    try:
+        return Path(path).relative_to(root).as_posix()
+    except ValueError:
+        return Path(path).as_posix()
+
+
+class HitReport:
+    """Accumulates per-rule hit counts and touched files across a dry run.
+
+    Rules are identified by ``(rule set name, rule key)`` pairs.
+    """
+
+    def __init__(self, rulesets, root):
+        self.rule_keys = [(rs.name, key) for rs in rulesets for key in rs.rewriter.rule_keys]
+        self.root = Path(root)
+        self.hits = Counter()
+        self.files = {}
+        self.files_scanned = 0
+        self.files_changed = 0
+        self.bytes_inserted = 0
+        self.bytes_removed = 0
+
+    def add(self, result):
+        self.files_scanned += 1
+        if result.changed:
+            self.files_changed += 1
+            self.bytes_inserted += result.inserted
+            self.bytes_removed += result.removed
+        for key, count in (result.hits or {}).items():
+            self.hits[key] += count
+            self.files.setdefault(key, []).append(_display_name(result.path, self.root))
+
+    def as_dict(self):
+        return {
+            'files_scanned': self.files_scanned,
+            'files_changed': self.files_changed,
+            'bytes_inserted': self.bytes_inserted,
+            'bytes_removed': self.bytes_removed,
+            'rules': [{'ruleset': key[0], 'rule': key[1], 'hits': self.hits[key],
+                       'files': self.files.get(key, [])}
+                      for key in self.rule_keys if self.hits[key]],
+            'unused_rules': [{'ruleset': key[0], 'rule': key[1]}
+                             for key in self.rule_keys if not self.hits[key]],
+        }
+
+    def write(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.as_dict(), f, ensure_ascii=False, indent=2)
+
+
+# ── PROFILING ────────────────────────────────────────────────────────
+
+class Profile:
+    """Aggregates the timings FileResults carry when profiling is on.
+
+    Written as JSON and as a pstats file (``python -m pstats PATH``) in
+    which every file phase, rule set and rule is a pseudo-function: file
+    phases under the file's name, rule sets under ``<rule set>``, rules
+    under their rule set's name with the hit count as the call count. A
+    rule's time is its isolated scan (see _rule_scan_times), measured
+    outside the run itself.
+    """
+
+    PHASES = ('read', 'lex', 'rewrite', 'write')
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.files = []
+        self.rulesets = {}
+        self.rules = {}
+
+    def add(self, result):
+        timings = result.timings
+        if timings is None:
+            return
+        entry = {'file': _display_name(result.path, self.root), 'size': result.size,
+                 'changed': result.changed, 'total': timings['total']}
+        entry.update((phase, timings[phase]) for phase in self.PHASES)
+        entry['rulesets'] = timings['rulesets']
+        self.files.append(entry)
+        for name, seconds in timings['rulesets'].items():
+            total = self.rulesets.setdefault(name, [0, 0.0])
+            total[0] += 1
+            total[1] += seconds
+        hits = result.hits or {}
+        for key, seconds in timings['rules'].items():
+            total = self.rules.setdefault(key, [0, 0.0])
+            total[0] += hits.get(key, 0)
+            total[1] += seconds
+
+    def as_dict(self):
+        return {
+            'totals': {key: sum(f[key] for f in self.files)
+                       for key in self.PHASES + ('total',)},
+            'files': sorted(self.files, key=lambda f: -f['total']),
+            'rulesets': [{'ruleset': name, 'files': count, 'seconds': seconds}
+                         for name, (count, seconds) in self.rulesets.items()],
+            'rules': [{'ruleset': key[0], 'rule': key[1], 'hits': hits, 'scan_seconds': seconds}
+                      for key, (hits, seconds) in sorted(self.rules.items(),
+                                                         key=lambda item: -item[1][1])],
+        }
+
+    def write(self, path):
+        """Write ``path`` (JSON) and the same path with a ``.pstats`` suffix."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.as_dict(), f, ensure_ascii=False, indent=2)
+
+        # pstats entries: (file, line, name) -> (primitive calls, calls,
+        # own time, cumulative time, callers)
+        stats = {}
+        for f in self.files:
+            for phase in self.PHASES:
+                if f[phase]:
+                    own = f[phase]
+                    if phase == 'rewrite':
+                        # Time inside the rule sets is listed under them
+                        own = max(0.0, own - sum(f['rulesets'].values()))
+                    stats[(f['file'], 0, phase)] = (1, 1, own, f[phase], {})
+        for name, (count, seconds) in self.rulesets.items():
+            stats[('<rule set>', 0, name)] = (count, count, seconds, seconds, {})
+        for (ruleset, rule), (hits, seconds) in self.rules.items():
+            stats[(ruleset, 0, rule)] = (hits, hits, seconds, seconds, {})
+        with open(path.with_suffix('.pstats'), 'wb') as f:
+            marshal.dump(stats, f)
+
+
+# ── GIT ──────────────────────────────────────────────────────────────
+# Narrow the plan to what a commit actually touches, so a pre-commit hook
+# costs time proportional to the diff rather than to the tree.
+
+def _git(cwd, *args):
+    return subprocess.run(['git', '-C', str(cwd), *args], check=True,
+                          capture_output=True).stdout
+
+
+def git_changed_files(cwd, staged=False, since=None):
+    """Resolved paths git reports as staged and/or changed since ``since``.
+
+    Deleted files are left out. Raises CalledProcessError outside a git
+    work tree or for an unknown ref.
+    """
+    top = Path(os.fsdecode(_git(cwd, 'rev-parse', '--show-toplevel').strip()))
+    args = ['diff', '--name-only', '-z', '--diff-filter=d']
+    if staged:
+        args.append('--cached')
+    if since:
+        args.extend([since, '--'])
+    names = _git(cwd, *args).split(b'\0')
+    return {(top / os.fsdecode(name)).resolve() for name in names if name}
+
+
+def git_staged_text(path):
+    """Content of ``path`` as staged in the index, not as in the work tree."""
+    path = Path(path).resolve()
+    return _git(path.parent, 'show', ':./' + path.name).decode('utf-8')
+
+
+def check_staged(plan, scope='classes'):
+    """Yield the paths in ``plan`` whose staged content the rule sets would change."""
+    for path, rulesets in plan.items():
+        text = git_staged_text(path)
+        if apply_rulesets(text, rulesets, scope) != text:
+            yield path
+
+
+# ── WATCH MODE ───────────────────────────────────────────────────────
+# Linux inotify through ctypes, so no third-party dependency is needed; where
+# it is unavailable the directories are polled by (size, mtime) instead.
+# Either watcher only reports candidate paths -- what to rewrite is decided
+# by the current plan, and files whose content still matches what the
+# watcher wrote itself are left alone through rewrite_file's known digest.
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+_INOTIFY_EVENT = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """Recursive inotify watch over ``dirs``."""
+
+    MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    def __init__(self, dirs):
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        # AttributeError on a libc without inotify, OSError if it fails
+        self.fd = self._libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.dirs = {}
+        for top in dirs:
+            self._add_tree(top)
+
+    def _add_tree(self, top):
+        for dirpath, _, _ in os.walk(top):
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(dirpath), self.MASK)
+            if wd >= 0:
+                self.dirs[wd] = Path(dirpath)
+
+    def wait(self, timeout=None):
+        """Paths changed within ``timeout`` seconds (``None``: block until one
+        is); returns ``None`` when events were lost and everything must be
+        rechecked."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        buf = os.read(self.fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset < len(buf):
+            wd, mask, _, length = _INOTIFY_EVENT.unpack_from(buf, offset)
+            name = buf[offset + _INOTIFY_EVENT.size:offset + _INOTIFY_EVENT.size + length]
+            offset += _INOTIFY_EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            base = self.dirs.get(wd)
+            name = name.rstrip(b'\0')
+            if base is None or not name:
+                continue
+            path = base / os.fsdecode(name)
+            if mask & IN_ISDIR:
+                # A new or moved-in directory: watch it and take its files
+                self._add_tree(path)
+                changed.update(p for p in path.rglob('*') if p.is_file())
+            else:
+                changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback watcher comparing (size, mtime) snapshots of ``dirs``."""
+
+    def __init__(self, dirs, interval=0.5):
+        self.dirs = list(dirs)
+        self.interval = interval
+        self.snapshot = self._stat_all()
+
+    def _stat_all(self):
+        snapshot = {}
+        for top in self.dirs:
+            for dirpath, _, filenames in os.walk(top):
+                for filename in filenames:
+                    path = Path(dirpath) / filename
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    snapshot[path] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def wait(self, timeout=None):
+        """Same contract as InotifyWatcher.wait."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._stat_all()
+            changed = {p for p, stamp in current.items() if self.snapshot.get(p) != stamp}
+            self.snapshot = current
+            if changed:
+                return changed
+            if deadline is None:
+                time.sleep(self.interval)
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return set()
+                time.sleep(min(self.interval, remaining))
+
+    def close(self):
+        pass
+
+
+def open_watcher(dirs):
+    """An InotifyWatcher on Linux when inotify is available, else a PollingWatcher."""
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(dirs)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(dirs)
+
+
+def watch_dirs(root, patterns):
+    """Directories to watch: the literal (glob-free) prefix of each pattern."""
+    dirs = set()
+    for pattern in patterns:
+        base = Path(root)
+        for part in Path(pattern).parts[:-1]:
+            if any(ch in part for ch in '*?['):
+                break
+            base = base / part
+        if base.is_dir():
+            dirs.add(base)
+    # Nested directories are already covered by their parent's recursive watch
+    return sorted(d for d in dirs if not any(p != d and p in d.parents for p in dirs))
+
+
+def next_batch(watcher, debounce):
+    """Block until files change, then keep collecting until ``debounce``
+    seconds pass without further events. ``None`` means recheck everything."""
+    changed = watcher.wait()
+    while changed is not None:
+        more = watcher.wait(debounce)
+        if more is None:
+            return None
+        if not more:
+            return changed
+        changed |= more
+    return None
+
+
+# ── CLI ──────────────────────────────────────────────────────────────
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Add dark: variants to Tailwind class strings in TSX files.')
+    parser.add_argument('root', nargs='?', type=Path,
+                        help="directory to scan; every selected rule set is applied to "
+                             "every file under it (default: each rule set's own selectors "
+                             "within the repository)")
+    parser.add_argument('--rules', type=Path, default=RULES_FILE,
+                        help='rule file (default: %(default)s)')
+    parser.add_argument('--ruleset', action='append', metavar='NAME',
+                        help='rule set to apply, repeatable; they run in rule-file order '
+                             '(default: all)')
+    parser.add_argument('--include', action='append', metavar='GLOB',
+                        help="glob relative to root to process (default: **/*.tsx with "
+                             "an explicit root, otherwise the rule set's includes)")
+    parser.add_argument('--exclude', action='append', metavar='GLOB', default=[],
+                        help='glob for paths or file names to skip')
+    parser.add_argument('--mode', choices=sorted(MODES),
+                        help='substring: single-pass needle replacement; '
+                             'tokens: idempotent per-className token rules '
+                             '(default: substring; required with --check, which must '
+                             'use the mode of the rewrite it guards)')
+    parser.add_argument('--normalize', action='store_true',
+                        help='after the rule sets, drop repeated class tokens and tokens '
+                             'overridden by a later one in the same utility group and '
+                             'variants')
+    parser.add_argument('--scope', choices=('classes', 'file'), default='classes',
+                        help='classes: match only inside className/cn()/clsx() strings; '
+                             'file: match anywhere in the file text (default: %(default)s)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='skip files unchanged since the last run '
+                             f'(manifest kept under {CACHE_DIR.relative_to(ROOT)}; '
+                             'not used by --check --staged, which reads the index)')
+    parser.add_argument('--store', type=Path, nargs='?', const=default_store_dir(),
+                        metavar='DIR',
+                        help='reuse and record rewrite outputs in a content-addressed store '
+                             'shared by all checkouts (default with no DIR, or when '
+                             'FIX_DARK_MODE_STORE is set: %(const)s)')
+    parser.add_argument('--store-size', type=int, default=256, metavar='MB',
+                        help='evict least recently used store entries beyond this size '
+                             '(default: %(default)s)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='write nothing; print unified diffs and a per-rule hit report')
+    parser.add_argument('--report', type=Path, default=CACHE_DIR / 'report.json',
+                        help='where --dry-run writes its JSON report (default: %(default)s)')
+    parser.add_argument('--profile', type=Path, metavar='PATH',
+                        help='record per-file read/lex/rewrite/write times and per-rule '
+                             'hits and scan times; written as JSON to PATH and as pstats '
+                             'to PATH with a .pstats suffix')
+    parser.add_argument('--staged', action='store_true',
+                        help='only process files staged in git (their staged content '
+                             'with --check)')
+    parser.add_argument('--since', metavar='REF',
+                        help='only process files git reports as changed since REF')
+    parser.add_argument('--check', action='store_true',
+                        help='write nothing; list files that would be rewritten and exit '
+                             'with status 1 if there are any (for pre-commit hooks)')
+    parser.add_argument('--watch', action='store_true',
+                        help='after the first pass, keep running and rewrite files as they '
+                             'are saved (inotify on Linux, polling elsewhere)')
+    parser.add_argument('--debounce', type=float, default=0.2, metavar='SECONDS',
+                        help='in --watch, wait this long after the last change before '
+                             'rewriting (default: %(default)s)')
+    parser.add_argument('--revert', metavar='RUN_ID',
+                        help='undo the edits of an earlier run (its id is printed at the '
+                             'end of the run; journals are kept under '
+                             f'{JOURNAL_DIR.relative_to(ROOT)}) and exit')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='worker processes (default: CPU count)')
+    args = parser.parse_args(argv)
+    if args.watch and args.dry_run:
+        parser.error('--watch cannot be combined with --dry-run')
+    if args.check and (args.dry_run or args.watch):
+        parser.error('--check cannot be combined with --dry-run or --watch')
+    if args.store is None and os.environ.get('FIX_DARK_MODE_STORE'):
+        args.store = default_store_dir()
+    if args.check and args.mode is None:
+        # A check only passes after a rewrite in the same mode, and substring
+        # rules fire again on already-rewritten text, so there is no safe default
+        parser.error('--check needs --mode: the mode the files are rewritten with '
+                     '(tokens, which is idempotent, is the one that fits a hook)')
+    if args.mode is None:
+        args.mode = 'substring'
+    return args
+
+
+def rewrite_command(args):
+    """The command that rewrites the files a ``--check`` run of ``args`` flags."""
+    script = Path(__file__)
+    try:
+        script = script.relative_to(Path.cwd())
+    except ValueError:
+        pass
+    command = ['python', str(script)]
+    if args.root is not None:
+        command.append(str(args.root))
+    if args.rules != RULES_FILE:
+        command += ['--rules', str(args.rules)]
+    for name in args.ruleset or ():
+        command += ['--ruleset', name]
+    for pattern in args.include or ():
+        command += ['--include', pattern]
+    for pattern in args.exclude:
+        command += ['--exclude', pattern]
+    command += ['--mode', args.mode]
+    if args.normalize:
+        command.append('--normalize')
+    if args.scope != 'classes':
+        command += ['--scope', args.scope]
+    if args.staged:
+        command.append('--staged')
+    if args.since:
+        command += ['--since', args.since]
+    return shlex.join(command)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.revert:
+        try:
+            refused = revert_run(args.revert, print)
+        except (OSError, ValueError) as e:
+            sys.exit(str(e))
+        if refused:
+            sys.exit(f"{len(refused)} files were not reverted")
+        return
+
+    available = load_rulesets(args.rules, args.mode)
+    unknown = [name for name in args.ruleset or () if name not in available]
+    if unknown:
+        sys.exit(f"Unknown rule set {unknown[0]!r}; {args.rules.name} defines: "
+                 + ', '.join(available))
+    rulesets = [rs for name, rs in available.items()
+                if args.ruleset is None or name in args.ruleset]
+    normalizer = normalizer_ruleset() if args.normalize else None
+    stages = rulesets + [normalizer] if normalizer is not None else rulesets
+
+    root = ROOT if args.root is None else args.root
+    if args.root is None:
+        patterns = args.include or [p for rs in rulesets for p in rs.include]
+
+        def make_plan():
+            plan = plan_files(ROOT, rulesets, args.include, args.exclude)
+            if normalizer is not None:
+                # The normalizer follows the rule sets on every file they target
+                plan = {path: applied + [normalizer] for path, applied in plan.items()}
+            return plan
     else:
-        print(f"  No changes: {os.path.basename(filepath)}")
+        patterns = args.include or ['**/*.tsx']
+
+        def make_plan():
+            files = collect_files(args.root, patterns, args.exclude)
+            return {path: stages for path in files}
+
+    plan = make_plan()
+    if args.staged or args.since:
+        try:
+            changed = git_changed_files(root, args.staged, args.since)
+        except (OSError, subprocess.CalledProcessError) as e:
+            detail = getattr(e, 'stderr', None) or b''
+            sys.exit(f"git failed: {detail.decode(errors='replace').strip() or e}")
+        plan = {p: rulesets for p, rulesets in plan.items() if p.resolve() in changed}
+    files = list(plan)
+
+    # In a dry run stdout carries the diffs, so progress goes to stderr
+    log = partial(print, file=sys.stderr if args.dry_run else sys.stdout)
+    log(f"Found {len(files)} files to process")
+
+    manifest = None
+    known_digests = {} if args.watch else None
+    # The manifest describes the work tree, but --check --staged reads the
+    # index, where a file can differ from its unchanged work-tree copy
+    if args.incremental and not (args.check and args.staged):
+        manifest = Manifest.load(CACHE_DIR / 'manifest.json',
+                                 pipeline_digest(stages, args.scope))
+        stale = [p for p in files if not manifest.is_fresh(p)]
+        if len(stale) < len(files):
+            log(f"  Skipping {len(files) - len(stale)} files unchanged since last run")
+        known_digests = {p: manifest.digest(p) for p in files}
+        plan = {p: plan[p] for p in stale}
+
+    if args.check:
+        if args.staged:
+            dirty = list(check_staged(plan, args.scope))
+        else:
+            dirty = [result.path for result in rewrite_files(
+                plan, args.jobs, known_digests, dry_run=True, scope=args.scope)
+                if result.changed]
+        for path in dirty:
+            log(f"  Would rewrite: {os.path.relpath(path)}")
+        if dirty:
+            sys.exit(f"{len(dirty)} files need dark-mode rewrites; run:\n"
+                     f"  {rewrite_command(args)}")
+        log("All files up to date.")
+        return
+
+    report = HitReport(stages, root) if args.dry_run else None
+    profile = Profile(root) if args.profile else None
+    store = None
+    if args.store is not None and report is None and profile is None:
+        store = OutputStore(args.store, args.store_size << 20)
+    journal = Journal() if report is None else None
+    total_changes = 0
+    from_store = 0
+    try:
+        for result in rewrite_files(plan, args.jobs, known_digests, args.dry_run, args.scope,
+                                    profile is not None, store, journal is not None):
+            if profile is not None:
+                profile.add(result)
+            if report is not None:
+                report.add(result)
+                if result.diff:
+                    sys.stdout.write(result.diff)
+                continue
+            if manifest is not None:
+                manifest.record(result)
+            if known_digests is not None:
+                known_digests[result.path] = result.digest
+            journal.record(result)
+            from_store += result.cached
+            if result.changed:
+                log(f"  Updated: {result.path.name}")
+                total_changes += 1
+            else:
+                log(f"  No changes: {result.path.name}")
+    finally:
+        # An interrupted run can still be reverted as far as it got
+        run_id = journal.close() if journal is not None else None
+
+    if profile is not None:
+        profile.write(args.profile)
+        log(f"Profile: {args.profile} and {args.profile.with_suffix('.pstats')}")
+
+    if report is not None:
+        report.write(args.report)
+        log(f"\nDry run: {report.files_changed} files would change, "
+            f"{len(report.as_dict()['unused_rules'])} rules never fired. Report: {args.report}")
+        return
+
+    if manifest is not None:
+        manifest.save()
+
+    log(f"\nDone! Updated {total_changes} files.")
+    if run_id is not None:
+        log(f"Journal: run {run_id}; undo with --revert {run_id}")
+    if store is not None:
+        evicted = store.prune()
+        log(f"Output store: {from_store} files served from {store.path}"
+            + (f", {evicted} old entries evicted" if evicted else ""))
+
+    if args.watch:
+        watch(make_plan, watch_dirs(root, patterns), args, known_digests, manifest,
+              log, store)
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def watch(make_plan, dirs, args, known_digests, manifest, log, store=None):
+    """Rewrite planned files as they change, until interrupted.
+
+    ``known_digests`` holds the content each file was left in; a change
+    event for a file still in that state (our own write, or a save that
+    changed nothing) is ignored. The whole session is journaled as one run,
+    so a long session cannot push older runs out of the journal directory;
+    it can be reverted once watching stops. SIGTERM and SIGHUP (a closed
+    terminal) stop watching like Ctrl+C, so the journal is still finished.
+    """
+    watcher = open_watcher(dirs)
+    kind = 'inotify' if isinstance(watcher, InotifyWatcher) else 'polling'
+    log(f"\nWatching {len(dirs)} directories ({kind}); press Ctrl+C to stop")
+    journal = Journal()
+    previous = {}
+    for name in ('SIGTERM', 'SIGHUP'):
+        if hasattr(signal, name):
+            signum = getattr(signal, name)
+            previous[signum] = signal.signal(signum, _interrupt)
+    try:
+        while True:
+            changed = next_batch(watcher, args.debounce)
+            plan = make_plan()
+            if changed is not None:
+                plan = {p: rulesets for p, rulesets in plan.items() if p in changed}
+            for result in rewrite_files(plan, args.jobs, known_digests, scope=args.scope,
+                                        store=store, journal=True):
+                known_digests[result.path] = result.digest
+                if manifest is not None:
+                    manifest.record(result)
+                journal.record(result)
+                if result.changed:
+                    log(f"  Updated: {result.path.name}")
+            if manifest is not None and plan:
+                manifest.save()
+    except KeyboardInterrupt:
+        log("Stopped watching.")
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+        watcher.close()
+        run_id = journal.close()
+        if run_id is not None:
+            log(f"Journal: run {run_id}; undo with --revert {run_id}")
+
 
-print(f"\nDone! Updated {total_changes} files.")
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,354 @@
+import argparse
+import os
+import re
+import sys
+from pathlib import Path
+
+from fix_dark_mode import ROOT, TokenRewriter, atomic_write, collect_files, pool_map
+from tsx_lexer import skip_code, skip_comment, skip_string
+from update_admin_modal import PatchError, reindent, splice
+
+# Batch version of update_admin_modal.py.  Every modal that still hides itself
+# with `if (!isOpen) return null;` gets the same migration as AddLectureModal:
+#   1. `motion` / `AnimatePresence` are imported from framer-motion
+#   2. the guard goes away and the fixed overlay becomes
+#      <AnimatePresence>{isOpen && (<motion.div ...overlay>)}</AnimatePresence>
+#      with the dialog panel inside it turned into a spring-animated motion.div
+#   3. the header (first border-b row) and footer (last border-t row) of the
+#      panel get their dark-mode border/background variants
+# Files that don't fit the template are skipped with the reason, never
+# half-migrated.
+
+GUARD = re.compile(r'^[ \t]*if \(!isOpen\) return null;[ \t]*\r?\n', re.M)
+RETURN = re.compile(r'([ \t]*)return \(\r?\n')
+DIV = re.compile(r'<div\b|</div\s*>')
+CLASS_NAME = re.compile(r'className=(?:"[^"]*"|\{`[^`]*`\})')
+LAST_IMPORT = re.compile(r"""^(?:import\b[^\n]*|\}[^\n]*)\bfrom\s+['"][^'"]+['"];?[ \t]*$""", re.M)
+FRAMER_IMPORT = re.compile(r"""^import \{([^}]*)\} from ['"]framer-motion['"];?""", re.M)
+ARROW = re.compile(r'(?:export\s+)?(?:const|let)\s+\w+[^=]*=\s*(?:async\s*)?'
+                   r'(?:\([^()]*\)|\w+)\s*(?::[^=]*?)?=>')
+
+# Header/footer chrome, applied per class string by the token rewriter
+CHROME_RULES = [
+    ('border-b border-slate-100', 'border-b border-slate-100 dark:border-white/5'),
+    ('border-b border-slate-200', 'border-b border-slate-200 dark:border-white/5'),
+    ('border-t border-slate-100', 'border-t border-slate-100 dark:border-white/5'),
+    ('border-t border-slate-200', 'border-t border-slate-200 dark:border-white/5'),
+    ('bg-slate-50/50', 'bg-slate-50/50 dark:bg-white/5'),
+    ('bg-slate-50', 'bg-slate-50 dark:bg-white/5'),
+    ('bg-white', 'bg-white dark:bg-[#1E1E1E]'),
+    ('text-charcoal', 'text-charcoal dark:text-white'),
+    ('text-slate-900', 'text-slate-900 dark:text-white'),
+]
+
+OVERLAY_MOTION = ['initial={{ opacity: 0 }}',
+                  'animate={{ opacity: 1 }}',
+                  'exit={{ opacity: 0 }}']
+PANEL_MOTION = ['initial={{ scale: 0.95, y: 20, opacity: 0 }}',
+                'animate={{ scale: 1, y: 0, opacity: 1 }}',
+                'exit={{ scale: 0.95, y: 20, opacity: 0 }}',
+                'transition={{ type: "spring", duration: 0.5, bounce: 0.3 }}']
+
+
+class Skip(Exception):
+    """The file does not have the shape the migration template expects."""
+
+
+# ── SCANNING ─────────────────────────────────────────────────────────
+# Statement and JSX tag boundaries, built on tsx_lexer's string, template
+# and comment skipping.
+
+def _statement_end(text, i):
+    """End of the statement starting at ``i``: a depth-0 ``;``, or the closing
+    brace of a function declaration."""
+    is_function = re.match(r'(?:export\s+)?(?:async\s+)?function\b', text[i:i + 40])
+    depth = 0
+    while i < len(text):
+        ch = text[i]
+        if ch in '\'"`':
+            i = skip_string(text, i)
+            continue
+        if text.startswith('//', i) or text.startswith('/*', i):
+            i = skip_comment(text, i)
+            continue
+        if ch in '([{':
+            depth += 1
+        elif ch in ')]}':
+            depth -= 1
+            if is_function and ch == '}' and depth == 0:
+                return i + 1
+        elif ch == ';' and depth == 0:
+            return i + 1
+        i += 1
+    return i
+
+
+def _skip_blank(text, i):
+    while i < len(text):
+        if text[i].isspace():
+            i += 1
+        elif text.startswith('//', i) or text.startswith('/*', i):
+            i = skip_comment(text, i)
+        else:
+            break
+    return i
+
+
+def _blank_strings(code):
+    out = []
+    i = 0
+    while i < len(code):
+        if code[i] in '\'"`':
+            j = skip_string(code, i)
+            out.append('""')
+            i = j
+        else:
+            out.append(code[i])
+            i += 1
+    return ''.join(out)
+
+
+def _is_safe_when_closed(statement):
+    """True for statements that can run while the modal is closed: function
+    definitions and constants that touch no properties and call nothing."""
+    code = _blank_strings(statement)
+    if re.match(r'(?:export\s+)?(?:async\s+)?function\b', code) or ARROW.match(code):
+        return True
+    m = re.match(r'(?:const|let)\s+\w+\s*(?::[^=]+)?=(.*)', code, re.S)
+    return bool(m) and not re.search(r'[.\[(]', m.group(1))
+
+
+def tag_end(text, i):
+    """``(index past '>', self_closing)`` for the JSX opening tag at ``i``."""
+    j = i + 1
+    while j < len(text):
+        ch = text[j]
+        if ch in '\'"`':
+            j = skip_string(text, j)
+            continue
+        if ch == '{':
+            j = skip_code(text, j + 1, '}')
+            continue
+        if ch == '>':
+            return j + 1, text[j - 1] == '/'
+        j += 1
+    raise Skip('unterminated JSX tag')
+
+
+def matching_close(text, i):
+    """Span of the ``</div>`` closing the div whose opening tag ends at ``i``."""
+    depth = 1
+    pos = i
+    while True:
+        m = DIV.search(text, pos)
+        if m is None:
+            raise Skip('unbalanced <div> tags')
+        if m.group().startswith('</'):
+            depth -= 1
+            if depth == 0:
+                return m.start(), m.end()
+            pos = m.end()
+        else:
+            pos, self_closing = tag_end(text, m.start())
+            if not self_closing:
+                depth += 1
+
+
+def _children(text, start, end):
+    """Opening-tag spans of the direct <div> children between ``start`` and ``end``."""
+    out = []
+    pos = start
+    while True:
+        m = DIV.search(text, pos, end)
+        if m is None or m.group().startswith('</'):
+            return out
+        open_end, self_closing = tag_end(text, m.start())
+        out.append((m.start(), open_end, self_closing))
+        pos = open_end if self_closing else matching_close(text, open_end)[1]
+
+
+def _attrs(text, start, end, self_closing=False):
+    """Attributes of the opening tag at ``text[start:end]``, joined on one line."""
+    inner = text[start + len('<div'):end - (2 if self_closing else 1)]
+    return ' '.join(line.strip() for line in inner.splitlines() if line.strip())
+
+
+def _column(text, i):
+    return i - (text.rfind('\n', 0, i) + 1)
+
+
+# ── TEMPLATE ─────────────────────────────────────────────────────────
+
+def _motion_tag(indent, motion, attrs):
+    pad = ' ' * (indent + 4)
+    lines = ['<motion.div'] + [pad + prop for prop in motion]
+    if attrs:
+        lines.append(pad + attrs)
+    lines.append(' ' * indent + '>')
+    return '\n'.join(lines)
+
+
+def _import_edit(content):
+    framer = FRAMER_IMPORT.search(content)
+    if framer:
+        names = [n.strip() for n in framer.group(1).split(',') if n.strip()]
+        missing = [n for n in ('motion', 'AnimatePresence') if n not in names]
+        if not missing:
+            return None
+        new = "import { " + ', '.join(names + missing) + " } from 'framer-motion';"
+        return (framer.start(), framer.end()), new
+    last = None
+    for last in LAST_IMPORT.finditer(content):
+        pass
+    if last is None:
+        raise Skip('no import statements')
+    return (last.end(), last.end()), "\nimport { motion, AnimatePresence } from 'framer-motion';"
+
+
+def migrate(content, chrome=None):
+    """Return ``content`` with the modal migration applied, or raise Skip."""
+    guards = list(GUARD.finditer(content))
+    if not guards:
+        raise Skip('no `if (!isOpen) return null;` guard')
+    if len(guards) > 1:
+        raise Skip(f'{len(guards)} isOpen guards')
+    guard = guards[0]
+
+    # Everything the guard used to protect must be safe to run while closed
+    pos = _skip_blank(content, guard.end())
+    while not content.startswith('return (', pos):
+        if pos >= len(content):
+            raise Skip('no JSX return after the guard')
+        end = _statement_end(content, pos)
+        if not _is_safe_when_closed(content[pos:end]):
+            line = content[pos:end].strip().splitlines()[0]
+            raise Skip(f'code after the guard depends on props: {line[:60]}')
+        pos = _skip_blank(content, end)
+    ret = RETURN.match(content, pos - _column(content, pos))
+    if ret is None:
+        raise Skip('JSX return is not `return (` on its own line')
+    base = len(ret.group(1))
+
+    # The returned root must be the fixed overlay <div>
+    root = _skip_blank(content, ret.end())
+    if not content.startswith('<div', root):
+        raise Skip('JSX root is not a <div>')
+    root_open_end, self_closing = tag_end(content, root)
+    if self_closing or 'fixed' not in content[root:root_open_end] \
+            or 'inset-0' not in content[root:root_open_end]:
+        raise Skip('JSX root is not a fixed inset-0 overlay')
+    root_close = matching_close(content, root_open_end)
+    if not re.match(r'\s*\)', content[root_close[1]:]):
+        raise Skip('JSX root has siblings')
+
+    # The panel is the first direct child that isn't a self-closing backdrop
+    inner_edits = []
+    panels = [c for c in _children(content, root_open_end, root_close[0]) if not c[2]]
+    if panels:
+        p_start, p_open_end, _ = panels[0]
+        p_close = matching_close(content, p_open_end)
+        col = _column(content, p_start)
+        inner_edits.append(((p_start, p_open_end),
+                            _motion_tag(col, PANEL_MOTION, _attrs(content, p_start, p_open_end))))
+        inner_edits.append((p_close, '</motion.div>'))
+
+        rows = _children(content, p_open_end, p_close[0])
+        header = next((r for r in rows if 'border-b' in content[r[0]:r[1]]), None)
+        footer = next((r for r in reversed(rows) if 'border-t' in content[r[0]:r[1]]), None)
+        chrome = chrome or TokenRewriter(CHROME_RULES)
+        for row in {header, footer} - {None}:
+            tag = content[row[0]:row[1]]
+            restyled = CLASS_NAME.sub(lambda m: chrome.sub(m.group()), tag)
+            if restyled != tag:
+                inner_edits.append(((row[0], row[1]), restyled))
+
+    # Rebuild the overlay: two levels deeper, wrapped in AnimatePresence
+    col = _column(content, root)
+    inner_start, inner_end = root_open_end, root_close[0]
+    shifted = [((s - inner_start, e - inner_start), new) for (s, e), new in inner_edits]
+    # Drop the closing tag's own indentation; it is re-added two levels deeper
+    inner = splice(content[inner_start:inner_end], shifted).rstrip(' \t')
+    pad = ' ' * col
+    overlay = '\n'.join([
+        '<AnimatePresence>',
+        pad + '    {isOpen && (',
+        pad + '        ' + _motion_tag(col + 8, OVERLAY_MOTION,
+                                       _attrs(content, root, root_open_end)),
+    ])
+    block = (overlay + reindent(inner, 8) + pad + '        </motion.div>\n'
+             + pad + '    )}\n' + pad + '</AnimatePresence>')
+
+    blank_after = re.compile(r'[ \t]*\r?\n').match(content, guard.end())
+    edits = [((guard.start(), blank_after.end() if blank_after else guard.end()), ''),
+             ((root, root_close[1]), block)]
+    import_edit = _import_edit(content)
+    if import_edit:
+        edits.append(import_edit)
+    out = splice(content, edits)
+    if '\r\n' in content:
+        out = out.replace('\r\n', '\n').replace('\n', '\r\n')
+    return out
+
+
+# ── BATCH ────────────────────────────────────────────────────────────
+
+def migrate_file(task):
+    """Migrate one file; returns ``(path, status, detail)``."""
+    path, dry_run = task
+    try:
+        with open(path, 'rb') as f:
+            original = f.read().decode('utf-8')
+        content = migrate(original)
+    except Skip as exc:
+        return path, 'skipped', str(exc)
+    except (OSError, UnicodeDecodeError, PatchError) as exc:
+        return path, 'failed', str(exc)
+    if not dry_run:
+        atomic_write(path, content.encode('utf-8'))
+    return path, 'migrated', ''
+
+
+def find_candidates(root):
+    """TSX files under ``root`` that still use the isOpen guard."""
+    needle = b'if (!isOpen) return null;'
+    out = []
+    for path in collect_files(root, ['**/*.tsx'], []):
+        with open(path, 'rb') as f:
+            if needle in f.read():
+                out.append(path)
+    return out
+
+
+def migrate_files(files, jobs, dry_run=False):
+    """Yield ``(path, status, detail)`` per file, spread over ``jobs`` processes."""
+    yield from pool_map(migrate_file, [(path, dry_run) for path in files], jobs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Migrate isOpen-guarded modals to AnimatePresence/motion.div.')
+    parser.add_argument('paths', nargs='*', type=Path,
+                        help='files to migrate (default: every candidate under src/)')
+    parser.add_argument('--dry-run', action='store_true', help='report only, write nothing')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='worker processes (default: CPU count)')
+    args = parser.parse_args(argv)
+
+    files = args.paths or find_candidates(ROOT / 'src')
+    print(f"Found {len(files)} candidate modals")
+
+    counts = {'migrated': 0, 'skipped': 0, 'failed': 0}
+    for path, status, detail in migrate_files(files, args.jobs, args.dry_run):
+        counts[status] += 1
+        suffix = f" ({detail})" if detail else ''
+        print(f"  {status.capitalize()}: {Path(path).name}{suffix}")
+
+    verb = 'Would migrate' if args.dry_run else 'Migrated'
+    print(f"\nDone! {verb} {counts['migrated']}, skipped {counts['skipped']}, "
+          f"failed {counts['failed']}.")
+    if counts['failed']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+from pathlib import Path
+
+from fix_dark_mode import (Journal, TokenRewriter, _parse_rulesets, content_digest,
+                           normalizer_ruleset, revert_run, rewrite_files)
+
+SPLIT_RULES = '''
+[[ruleset]]
+name = "split"
+rules = [["label-x", "label-x ب"]]
+'''
+
+
+def _rewrite_journaled(tmp_path, rules, sources, normalize=False):
+    rulesets = list(_parse_rulesets(rules, 'substring').values())
+    if normalize:
+        rulesets.append(normalizer_ruleset())
+    paths = []
+    for name, source in sources.items():
+        path = tmp_path / name
+        path.write_bytes(source.encode('utf-8'))
+        paths.append(path)
+    journal = Journal(tmp_path / 'journal')
+    for result in rewrite_files({path: rulesets for path in paths}, 1, journal=True):
+        journal.record(result)
+    return paths, journal.close()
+
+
+def test_token_rules_ignore_the_quotes_substring_rules_anchor_on():
+    rewriter = TokenRewriter([
+        ("'bg-white text-slate-600 hover:border-slate-200'",
+         "'bg-white dark:bg-[#2A2A2A] text-slate-600 hover:border-slate-200 "
+         "dark:hover:border-white/10'"),
+        ('p-6 space-y-8"', 'p-6 space-y-8 dark:text-white"'),
+    ])
+    source = ("<li className={cn('hover:border-slate-200 text-slate-600 bg-white', x)} />\n"
+              '<div className="p-6 space-y-8" />\n')
+    assert rewriter.sub(source) == (
+        "<li className={cn('hover:border-slate-200 dark:hover:border-white/10 text-slate-600 "
+        "bg-white dark:bg-[#2A2A2A]', x)} />\n"
+        '<div className="p-6 space-y-8 dark:text-white" />\n')
+
+
+def test_token_rewriter_is_idempotent():
+    rewriter = TokenRewriter([('bg-white', 'bg-white dark:bg-[#1E1E1E]'),
+                              ('bg-white border-slate-100',
+                               'bg-white dark:bg-[#2A2A2A] border-slate-100 '
+                               'dark:border-white/5')])
+    source = ('<div className="bg-white border-slate-100 p-4">\n'
+              '  <p className="bg-white dark:bg-black">a</p>\n'
+              '</div>\n')
+    once = rewriter.sub(source)
+    assert once == ('<div className="bg-white dark:bg-[#2A2A2A] border-slate-100 '
+                    'dark:border-white/5 p-4">\n'
+                    '  <p className="bg-white dark:bg-black">a</p>\n'
+                    '</div>\n')
+    assert rewriter.sub(once) is once
+    assert rewriter.sub(once.encode('utf-8')) == once.encode('utf-8')
+
+
+def test_revert_restores_edits_that_split_a_character(tmp_path):
+    # ب and ت share their first UTF-8 byte, so the edit is a lone byte
+    source = 'export const A = () => <p className="label-x ت">a</p>;\n'
+    paths, run_id = _rewrite_journaled(tmp_path, SPLIT_RULES,
+                                       {'a.tsx': source, 'b.tsx': source})
+    assert run_id is not None
+    for path in paths:
+        assert path.read_text(encoding='utf-8') != source
+
+    assert revert_run(run_id, lambda line: None, tmp_path / 'journal') == []
+    for path in paths:
+        assert path.read_text(encoding='utf-8') == source
+
+
+def test_revert_undoes_stages_that_rewrite_each_other(tmp_path):
+    # The normalizer drops tokens the rule set has just inserted
+    rules = '''
+[[ruleset]]
+name = "dark"
+rules = [["bg-white", "bg-white dark:bg-gray-800 dark:bg-gray-900"],
+         ["text-black", "text-black dark:text-white"]]
+'''
+    source = ('<div className="bg-white p-4 dark:text-white text-black">\n'
+              '  <p className={cn("text-black", open && "bg-white")}>a</p>\n'
+              '</div>\n')
+    (path,), run_id = _rewrite_journaled(tmp_path, rules, {'a.tsx': source}, normalize=True)
+    assert path.read_text(encoding='utf-8') == (
+        '<div className="bg-white dark:bg-gray-900 p-4 dark:text-white text-black">\n'
+        '  <p className={cn("text-black dark:text-white", open && "bg-white '
+        'dark:bg-gray-900")}>a</p>\n'
+        '</div>\n')
+
+    assert revert_run(run_id, lambda line: None, tmp_path / 'journal') == []
+    assert path.read_text(encoding='utf-8') == source
+
+
+def test_revert_refuses_files_changed_since(tmp_path):
+    source = '<p className="label-x">a</p>\n'
+    (path,), run_id = _rewrite_journaled(tmp_path, SPLIT_RULES, {'a.tsx': source})
+    path.write_text('edited by hand\n', encoding='utf-8')
+    before = content_digest(path.read_bytes())
+
+    assert revert_run(run_id, lambda line: None, tmp_path / 'journal') == [path]
+    assert content_digest(path.read_bytes()) == before
+
+
+def test_revert_from_another_directory(tmp_path, monkeypatch):
+    (tmp_path / 'src').mkdir()
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / 'src' / 'a.tsx'
+    path.write_text('<p className="label-x">a</p>\n', encoding='utf-8')
+    rulesets = list(_parse_rulesets(SPLIT_RULES, 'substring').values())
+    journal = Journal(tmp_path / 'journal')
+    for result in rewrite_files({Path('src/a.tsx'): rulesets}, 1, journal=True):
+        journal.record(result)
+    run_id = journal.close()
+
+    monkeypatch.chdir(tmp_path / 'src')
+    assert revert_run(run_id, lambda line: None, tmp_path / 'journal') == []
+    assert path.read_text(encoding='utf-8') == '<p className="label-x">a</p>\n'
+
+
+def test_dry_run_counts_inserted_and_removed_bytes(tmp_path):
+    path = tmp_path / 'a.tsx'
+    path.write_text('<p className="bg-white">a</p>\n', encoding='utf-8')
+    rules = '[[ruleset]]\nname = "swap"\nrules = [["bg-white", "bg-black"]]\n'
+    rulesets = list(_parse_rulesets(rules, 'substring').values())
+    (result,) = rewrite_files({path: rulesets}, 1, dry_run=True)
+    assert (result.inserted, result.removed) == (len('black'), len('white'))
@@ -0,0 +1,188 @@
+import re
+from collections import namedtuple
+
+# Lightweight TSX lexer for the rewrite scripts.  Rather than tokenizing the
+# whole file (JSX text may contain stray apostrophes, Arabic copy, ...), it
+# jumps straight to the places where class names live and lexes only those
+# expressions:
+#   className="..."  /  className='...'
+#   className={...}   every string literal and template-literal chunk inside
+#                     the expression, including ones nested in ${...}
+#   cn(...) / clsx(...) string arguments, wherever the call appears
+# Offsets are into the original text, so callers can splice edits back.
+#
+# ``text`` may be a str or any bytes-like object the re module accepts
+# (bytes, mmap).  Every delimiter is ASCII and UTF-8 never reuses ASCII
+# bytes inside a multi-byte character, so raw UTF-8 lexes exactly like the
+# decoded text, with byte offsets instead of character offsets.
+
+Syntax = namedtuple('Syntax', 'start string_stop code_stop quotes openers comments '
+                              'line_comment block_end newline backslash interpolation brace '
+                              'close_brace close_paren')
+
+
+def _syntax(literal):
+    return Syntax(
+        start=re.compile(literal(r'\b(?P<attr>className=)(?=["\'{])|\b(?:cn|clsx)\(')),
+        # Scanning jumps from one significant character to the next with these
+        string_stop={
+            literal('"'): re.compile(literal(r'["\\\n]')),
+            literal("'"): re.compile(literal(r"['\\\n]")),
+            literal('`'): re.compile(literal(r'[`\\]|\$\{')),
+        },
+        code_stop=re.compile(literal(r'[\'"`()\[\]{}]|//|/\*')),
+        quotes=literal('\'"`'),
+        openers=literal('([{'),
+        comments=(literal('//'), literal('/*')),
+        line_comment=literal('//'),
+        block_end=literal('*/'),
+        newline=literal('\n'),
+        backslash=literal('\\'),
+        interpolation=literal('${'),
+        brace=literal('{'),
+        close_brace=literal('}'),
+        close_paren=literal(')'),
+    )
+
+
+TEXT = _syntax(str)
+BYTES = _syntax(lambda s: s.encode('ascii'))
+
+
+def _for(text):
+    return TEXT if isinstance(text, str) else BYTES
+
+
+def skip_comment(text, i):
+    """Index just past the ``//`` or ``/* */`` comment starting at ``i``."""
+    syntax = _for(text)
+    if text[i:i + 2] == syntax.line_comment:
+        end = text.find(syntax.newline, i)
+        return len(text) if end < 0 else end
+    end = text.find(syntax.block_end, i + 2)
+    return len(text) if end < 0 else end + 2
+
+
+def _string_spans(text, i, syntax):
+    """Yield content spans of the literal at ``i``; returns the index past it."""
+    quote = text[i:i + 1]
+    stop = syntax.string_stop[quote]
+    start = i = i + 1
+    while True:
+        m = stop.search(text, i)
+        if m is None:
+            yield start, len(text)
+            return len(text)
+        ch = m.group()
+        if ch == syntax.backslash:
+            i = m.end() + 1
+        elif ch == syntax.interpolation:
+            yield start, m.start()
+            i = start = yield from _code_spans(text, m.end(), syntax.close_brace, syntax)
+        else:
+            # Closing quote, or a newline ending an unterminated string
+            yield start, m.start()
+            return m.end() if ch == quote else m.start()
+
+
+def _code_spans(text, i, closer, syntax):
+    """Yield content spans of every literal in the code starting at ``i``, up
+    to the balancing ``closer``; returns the index past it."""
+    depth = 0
+    while True:
+        m = syntax.code_stop.search(text, i)
+        if m is None:
+            return len(text)
+        ch = m.group()
+        if ch in syntax.quotes:
+            i = yield from _string_spans(text, m.start(), syntax)
+        elif ch in syntax.comments:
+            i = skip_comment(text, m.start())
+        elif ch in syntax.openers:
+            depth += 1
+            i = m.end()
+        elif depth == 0 and ch == closer:
+            return m.end()
+        else:
+            depth -= 1
+            i = m.end()
+
+
+def _drain(gen):
+    """Run a span generator to completion: ``(spans, return value)``."""
+    spans = []
+    while True:
+        try:
+            spans.append(next(gen))
+        except StopIteration as stop:
+            return spans, stop.value
+
+
+def skip_string(text, i):
+    """Index just past the string or template literal starting at ``i``."""
+    return _drain(_string_spans(text, i, _for(text)))[1]
+
+
+def skip_code(text, i, closer):
+    """Index just past the ``closer`` that balances the code starting at ``i``."""
+    syntax = _for(text)
+    if syntax is BYTES:
+        closer = closer.encode('ascii')
+    return _drain(_code_spans(text, i, closer, syntax))[1]
+
+
+def class_attributes(text):
+    """Yield ``(start, end, spans)`` for each class-bearing construct.
+
+    ``start``/``end`` cover the whole ``className=...`` attribute or
+    ``cn(...)`` call; ``spans`` lists the ``(start, end)`` content offsets
+    of its string literals and template-literal chunks, quotes excluded.
+    """
+    syntax = _for(text)
+    pos = 0
+    while True:
+        m = syntax.start.search(text, pos)
+        if m is None:
+            return
+        i = m.end()
+        if m.lastgroup == 'attr':
+            if text[i:i + 1] == syntax.brace:
+                gen = _code_spans(text, i + 1, syntax.close_brace, syntax)
+            else:
+                gen = _string_spans(text, i, syntax)
+        else:
+            gen = _code_spans(text, i, syntax.close_paren, syntax)
+        spans, end = _drain(gen)
+        yield m.start(), end, spans
+        pos = max(end, m.end())
+
+
+def class_spans(text):
+    """Yield the ``(start, end)`` content span of every class string in ``text``."""
+    for _, _, spans in class_attributes(text):
+        yield from spans
+
+
+def with_quotes(text, start, end):
+    """Widen a content span to include the quotes around it, where present."""
+    quotes = _for(text).quotes
+    if start > 0 and text[start - 1:start] in quotes:
+        start -= 1
+    if end < len(text) and text[end:end + 1] in quotes:
+        end += 1
+    return start, end
+
+
+# Shared by the rewriters that edit the spans found above.
+
+# Splits a class string into tokens and the whitespace between them
+WHITESPACE = re.compile(r'(\s+)')
+
+
+def pieces(text):
+    """``(view, join)`` for assembling output from slices of ``text``; bytes
+    input is sliced through a memoryview, so unchanged runs are not copied
+    until the final join."""
+    if isinstance(text, str):
+        return text, ''.join
+    return memoryview(text), b''.join
@@ -1,14 +1,229 @@
 import re
+from collections import namedtuple
+
+from fix_dark_mode import Matcher, atomic_write
+from tsx_lexer import class_attributes
+
+
+class PatchError(Exception):
+    """An anchor block is missing, ambiguous or overlaps another one."""
+
+
+# One structural edit: ``old`` must occur exactly ``count`` times, and every
+# occurrence is replaced by ``new``
+Patch = namedtuple('Patch', 'name old new count', defaults=(1,))
+
+
+# ── LINE INDEX ───────────────────────────────────────────────────────
+# Multi-line anchors are matched line by line after stripping each line, and
+# blank lines are ignored, so re-indentation, CRLF/LF changes and added or
+# removed blank lines (a Prettier/ESLint pass) don't break them.  Every
+# non-blank line of the target is hashed once; a block of k lines is found
+# with a Rabin-Karp rolling hash over windows of k line hashes, one O(n)
+# sweep per distinct block height, and confirmed by comparing the lines.
+
+_MOD = (1 << 61) - 1
+_BASE = 1_000_003
+LINE = re.compile(r'[^\n]*\n?')
+
+
+def _normalized_lines(text):
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def is_block(anchor):
+    return '\n' in anchor.strip('\r\n')
+
+
+class LineIndex:
+    """Normalized non-blank lines of a text with their character spans."""
+
+    def __init__(self, text):
+        self.lines = []    # stripped line text
+        self.spans = []    # (line start, end of line content, indent width)
+        for m in LINE.finditer(text):
+            raw = m.group().rstrip('\r\n')
+            stripped = raw.strip()
+            if stripped:
+                self.lines.append(stripped)
+                self.spans.append((m.start(), m.start() + len(raw),
+                                   len(raw) - len(raw.lstrip())))
+        self.hashes = [hash(line) % _MOD for line in self.lines]
+
+    def find_all(self, blocks):
+        """Return ``{block: [(start, end, indent width), ...]}`` for each block."""
+        wanted = {}
+        for block in blocks:
+            lines = _normalized_lines(block)
+            if lines:
+                wanted.setdefault(len(lines), []).append((block, lines))
+
+        found = {block: [] for block in blocks}
+        hashes = self.hashes
+        for k, group in wanted.items():
+            if k > len(hashes):
+                continue
+            targets = {}
+            for block, lines in group:
+                h = 0
+                for line in lines:
+                    h = (h * _BASE + hash(line) % _MOD) % _MOD
+                targets.setdefault(h, []).append((block, lines))
+
+            top = pow(_BASE, k - 1, _MOD)
+            h = 0
+            for x in hashes[:k]:
+                h = (h * _BASE + x) % _MOD
+            for i in range(len(hashes) - k + 1):
+                if i:
+                    h = ((h - hashes[i - 1] * top) * _BASE + hashes[i + k - 1]) % _MOD
+                for block, lines in targets.get(h, ()):
+                    if self.lines[i:i + k] == lines:
+                        start, _, indent = self.spans[i]
+                        found[block].append((start, self.spans[i + k - 1][1], indent))
+        return found
+
+
+def first_indent(block):
+    for line in block.splitlines():
+        if line.strip():
+            return len(line) - len(line.lstrip())
+    return 0
+
+
+def reindent(block, shift):
+    """Shift every line of ``block`` right (or left, if negative) by ``shift`` spaces."""
+    if shift == 0:
+        return block
+    out = []
+    for line in block.split('\n'):
+        if not line.strip():
+            out.append(line)
+        elif shift > 0:
+            out.append(' ' * shift + line)
+        else:
+            width = len(line) - len(line.lstrip(' '))
+            out.append(line[min(width, -shift):])
+    return '\n'.join(out)
+
+
+# ── PATCH ENGINE ─────────────────────────────────────────────────────
+
+def apply_patches(content, patches):
+    """Apply every patch to ``content`` in a single splice.
+
+    Single-line anchors are located in one exact pass -- ``className=...``
+    anchors only inside the class attributes tsx_lexer finds, the rest over
+    the whole text -- and multi-line anchors through the LineIndex; each must
+    match exactly ``patch.count`` times and spans must not overlap.  Block
+    replacements are re-indented to where the anchor was found and written
+    with the file's line endings.  A patch whose anchor is gone but whose
+    replacement is present ``patch.count`` times counts as applied, so the
+    script can be re-run.  Returns
+    ``(content, applied names, skipped names)``.
+    """
+    by_anchor = {}
+    for patch in patches:
+        if patch.old in by_anchor:
+            raise PatchError(f"{patch.name}: same anchor as {by_anchor[patch.old].name}")
+        by_anchor[patch.old] = patch
+
+    newline = '\r\n' if '\r\n' in content else '\n'
+    exact = [p for p in patches if not is_block(p.old)]
+    blocks = [p for p in patches if is_block(p.old)]
+
+    in_class = [p for p in exact if p.old.startswith('className=')]
+    anywhere = [p for p in exact if not p.old.startswith('className=')]
+    class_matcher = Matcher((p.old, p.new) for p in in_class)
+    matches = list(Matcher((p.old, p.new) for p in anywhere).pattern.finditer(content))
+    if in_class:
+        for start, end, _ in class_attributes(content):
+            matches.extend(class_matcher.pattern.finditer(content, start, end))
+    spans = {}
+    for m in matches:
+        spans.setdefault(m.group(), []).append((m.start(), m.end()))
+
+    index = LineIndex(content)
+    block_spans = index.find_all([p.old for p in blocks] + [p.new for p in blocks])
+
+    edits = []
+    applied, skipped, problems = [], [], []
+    for patch in exact:
+        new = patch.new.replace('\n', newline)
+        found = spans.get(patch.old, [])
+        if found and patch.old in patch.new:
+            # The replacement embeds its own anchor (e.g. an added import
+            # line); an anchor sitting inside it is already patched.
+            offset = patch.new.index(patch.old)
+            inner = set()
+            start = content.find(new)
+            while start >= 0:
+                inner.add(start + offset)
+                start = content.find(new, start + 1)
+            if inner:
+                found = [span for span in found if span[0] not in inner]
+                if not found:
+                    skipped.append(patch.name)
+                    continue
+        if len(found) == patch.count:
+            edits.extend((span, new) for span in found)
+            applied.append(patch.name)
+        elif found:
+            problems.append(f"{patch.name}: anchor matches {len(found)} times, "
+                            f"expected {patch.count}")
+        elif patch.old in content:
+            problems.append(f"{patch.name}: anchor overlaps another anchor")
+        elif content.count(new) == patch.count:
+            skipped.append(patch.name)
+        else:
+            problems.append(f"{patch.name}: anchor not found")
+
+    for patch in blocks:
+        found = block_spans[patch.old]
+        if len(found) == patch.count:
+            for start, end, indent in found:
+                new = reindent(patch.new.strip('\r\n'), indent - first_indent(patch.old))
+                edits.append(((start, end), new.replace('\n', newline)))
+            applied.append(patch.name)
+        elif found:
+            problems.append(f"{patch.name}: anchor block matches {len(found)} times, "
+                            f"expected {patch.count}")
+        elif len(block_spans[patch.new]) == patch.count:
+            skipped.append(patch.name)
+        else:
+            problems.append(f"{patch.name}: anchor block not found")
+
+    if problems:
+        raise PatchError('\n'.join(problems))
+    return splice(content, edits), applied, skipped
+
+
+def splice(content, edits):
+    """Build the output once from ``[((start, end), replacement), ...]`` edits."""
+    edits = sorted(edits)
+    for (prev, _), (cur, _) in zip(edits, edits[1:]):
+        if cur[0] < prev[1]:
+            raise PatchError(f"edits overlap at offsets {prev} and {cur}")
+
+    out = []
+    pos = 0
+    for (start, end), new in edits:
+        out.append(content[pos:start])
+        out.append(new)
+        pos = end
+    out.append(content[pos:])
+    return ''.join(out)
+
 
 file_path = "src/presentation/components/admin/AddLectureModal.tsx"
-with open(file_path, "r", encoding="utf-8") as f:
-    content = f.read()
+patches = []
 
 # 1. Imports
-content = content.replace(
+patches.append(Patch(
+    'framer-motion import',
     "import { X, ChevronLeft, ChevronRight, Check, Video, FileText, Calendar, Loader2, Radio, Upload, AlertCircle } from 'lucide-react';",
     "import { X, ChevronLeft, ChevronRight, Check, Video, FileText, Calendar, Loader2, Radio, Upload, AlertCircle } from 'lucide-react';\nimport { motion, AnimatePresence } from 'framer-motion';"
-)
+))
 
 # 2. Main Wrapper and Header
 old_wrapper_start = """    if (!isOpen) return null;
@@ -95,9 +310,9 @@ new_wrapper_start = """    return (
                             </div>
                         </div>
 
-                        <div className="p-6 overflow-y-auto flex-1 custom-scrollbar">"""
+                        <div className="p-6 overflow-y-auto flex-1 custom-scrollbar overscroll-contain">"""
 
-content = content.replace(old_wrapper_start, new_wrapper_start)
+patches.append(Patch('wrapper start', old_wrapper_start, new_wrapper_start))
 
 # 3. Transitions
 old_step1_form = """                    {step === 1 ? (
@@ -114,7 +329,7 @@ new_step1_form = """                    <AnimatePresence mode="wait">
                                 onSubmit={handleSubmitDetails}
                                 className="space-y-6"
                             >"""
-content = content.replace(old_step1_form, new_step1_form)
+patches.append(Patch('step1 form', old_step1_form, new_step1_form))
 
 old_step2_div = """                    ) : (
                         <div className="space-y-6">"""
@@ -128,38 +343,46 @@ new_step2_div = """                        </motion.form>
                                 transition={{ duration: 0.3 }}
                                 className="space-y-6 max-w-2xl mx-auto"
                             >"""
-content = content.replace(old_step2_div, new_step2_div)
+patches.append(Patch('step2 div', old_step2_div, new_step2_div))
 
 # 4. Inputs
-content = content.replace(
+patches.append(Patch(
+    'text input',
     'className="w-full h-10 px-3 rounded-lg border border-slate-200 focus:border-blue-500 outline-none transition-colors"',
-    'className="w-full h-11 px-3 rounded-xl border border-slate-200 dark:border-white/10 bg-white dark:bg-[#121212] text-charcoal dark:text-white focus:border-shibl-crimson focus:ring-1 focus:ring-shibl-crimson/30 outline-none transition-all placeholder-slate-400"'
-)
+    'className="w-full h-11 px-3 rounded-xl border border-slate-200 dark:border-white/10 bg-white dark:bg-[#121212] text-charcoal dark:text-white focus:border-shibl-crimson focus:ring-1 focus:ring-shibl-crimson/30 outline-none transition-all placeholder-slate-400"',
+    count=2,  # Arabic and English title
+))
 
-content = content.replace(
+patches.append(Patch(
+    'select input',
     'className="w-full h-10 px-3 rounded-lg border border-slate-200 focus:border-blue-500 outline-none transition-colors appearance-none bg-white"',
     'className="w-full h-11 px-3 rounded-xl border border-slate-200 dark:border-white/10 bg-white dark:bg-[#121212] text-charcoal dark:text-white focus:border-shibl-crimson focus:ring-1 focus:ring-shibl-crimson/30 outline-none transition-all appearance-none cursor-pointer"'
-)
+))
 
-content = content.replace(
+patches.append(Patch(
+    'disabled select input',
     'className="w-full h-10 px-3 rounded-lg border border-slate-200 focus:border-blue-500 outline-none transition-colors appearance-none bg-white disabled:bg-slate-50 disabled:cursor-not-allowed"',
     'className="w-full h-11 px-3 rounded-xl border border-slate-200 dark:border-white/10 bg-white dark:bg-[#121212] text-charcoal dark:text-white focus:border-shibl-crimson focus:ring-1 focus:ring-shibl-crimson/30 outline-none transition-all appearance-none disabled:bg-slate-50 dark:disabled:bg-white/5 disabled:cursor-not-allowed cursor-pointer"'
-)
+))
 
-content = content.replace(
+patches.append(Patch(
+    'locked select input',
     'className={`w-full h-10 px-3 rounded-lg border border-slate-200 focus:border-blue-500 outline-none transition-colors appearance-none bg-white ${formData.courseId && formData.teacherId ? \'bg-slate-50 text-slate-600 cursor-not-allowed\' : \'\'\n                                            }`}',
     'className={`w-full h-11 px-3 rounded-xl border border-slate-200 dark:border-white/10 text-charcoal dark:text-white focus:border-shibl-crimson focus:ring-1 focus:ring-shibl-crimson/30 outline-none transition-all appearance-none cursor-pointer ${formData.courseId && formData.teacherId ? \'bg-slate-50 dark:bg-white/5 text-slate-500 dark:text-slate-400 cursor-not-allowed pointer-events-none\' : \'bg-white dark:bg-[#121212]\'}`}'
-)
+))
 
-content = content.replace(
+patches.append(Patch(
+    'textarea',
     'className="w-full p-3 rounded-lg border border-slate-200 focus:border-blue-500 outline-none transition-colors resize-none"',
     'className="w-full p-3 rounded-xl border border-slate-200 dark:border-white/10 bg-white dark:bg-[#121212] text-charcoal dark:text-white focus:border-shibl-crimson focus:ring-1 focus:ring-shibl-crimson/30 outline-none transition-all resize-none placeholder-slate-400"'
-)
+))
 
-content = content.replace(
+patches.append(Patch(
+    'time input',
     'className="w-full h-10 pr-10 pl-3 rounded-lg border border-slate-200 focus:border-blue-500 outline-none transition-colors text-sm"',
-    'className="w-full h-11 pr-10 pl-3 rounded-xl border border-slate-200 dark:border-white/10 bg-white dark:bg-[#121212] text-charcoal dark:text-white focus:border-shibl-crimson focus:ring-1 focus:ring-shibl-crimson/30 outline-none transition-all text-sm"'
-)
+    'className="w-full h-11 pr-10 pl-3 rounded-xl border border-slate-200 dark:border-white/10 bg-white dark:bg-[#121212] text-charcoal dark:text-white focus:border-shibl-crimson focus:ring-1 focus:ring-shibl-crimson/30 outline-none transition-all text-sm"',
+    count=2,  # start and end time
+))
 
 # 5. Type Selection Cards
 old_live_card = """                                        <button
@@ -202,7 +425,7 @@ new_live_card = """                                        <button
                                                 <span className="text-xs text-slate-500 dark:text-slate-400">جدولة موعد للبث المباشر مع الطلاب</span>
                                             </div>
                                         </button>"""
-content = content.replace(old_live_card, new_live_card)
+patches.append(Patch('live card', old_live_card, new_live_card))
 
 old_recorded_card = """                                        <button
                                             type="button"
@@ -252,7 +475,7 @@ new_recorded_card = """                                        <button
                                                 <span className="text-xs text-slate-500 dark:text-slate-400">رفع فيديو مسجل مسبقاً للطلاب</span>
                                             </div>
                                         </button>"""
-content = content.replace(old_recorded_card, new_recorded_card)
+patches.append(Patch('recorded card', old_recorded_card, new_recorded_card))
 
 # 6. Close the outer div and AnimatePresence at the bottom
 old_footer = """                    )}
@@ -394,15 +617,31 @@ new_footer = """                            </motion.div>
                             </>
                         )}
                     </div>
+                    </motion.div>
                 </motion.div>
             )}
         </AnimatePresence>
     );
 }
 """
-content = content.replace(old_footer, new_footer)
+patches.append(Patch('footer', old_footer, new_footer))
+
+
+def main():
+    with open(file_path, "rb") as f:
+        content = f.read().decode("utf-8")
+
+    try:
+        content, applied, skipped = apply_patches(content, patches)
+    except PatchError as exc:
+        raise SystemExit(f"{file_path}: patch failed, nothing written\n{exc}")
+
+    if applied:
+        atomic_write(file_path, content.encode("utf-8"))
+    for name in skipped:
+        print(f"  Already applied: {name}")
+    print(f"Replacement Complete! Applied {len(applied)} patches.")
 
-with open(file_path, "w", encoding="utf-8") as f:
-    f.write(content)
 
-print("Replacement Complete!")
+if __name__ == "__main__":
+    main()